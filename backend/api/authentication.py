@@ -0,0 +1,119 @@
+from copy import copy
+from hashlib import sha256
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.authentication import (
+    TokenAuthentication, get_authorization_header,
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import constants
+from .db_routers import ause_primary_if_pinned, use_primary_if_pinned
+from food.lru import LRUCache
+from food.versions import aget_versions, get_cache_key, get_versions
+
+token_cache = LRUCache(
+    constants.AUTH_TOKEN_CACHE_SIZE, constants.AUTH_TOKEN_CACHE_TTL,
+)
+
+
+def get_token_cache_key(key):
+    return get_cache_key('token', sha256(key.encode()).hexdigest())
+
+
+def get_version_keys(user_id):
+    # user меняется при любом сохранении пользователя, в том числе смене
+    # пароля и is_active; auth — при удалении его токенов.
+    return ('user', user_id), ('auth', user_id)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кешем токенов и пользователей.
+
+    Токен с пользователем хранится в LRU-кеше процесса и, при
+    AUTH_TOKEN_SHARED_CACHE, в общем кеше по хешу ключа вместе с версиями
+    пользователя. Проверка версий — одно обращение к кешу вместо запроса
+    Token + User к БД; изменение пользователя или удаление токена меняет
+    версии и делает записи во всех процессах недействительными.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        entry = token_cache.get(cache_key)
+        if entry is None and settings.AUTH_TOKEN_SHARED_CACHE:
+            entry = cache.get(cache_key)
+            if entry is not None:
+                token_cache.set(cache_key, entry)
+        if entry is None or entry[1] != get_versions(
+            *get_version_keys(entry[0].user_id)
+        ):
+            _, token = super().authenticate_credentials(key)
+            entry = (token, get_versions(*get_version_keys(token.user_id)))
+            token_cache.set(cache_key, entry)
+            if settings.AUTH_TOKEN_SHARED_CACHE:
+                cache.set(cache_key, entry, constants.AUTH_TOKEN_CACHE_TTL)
+        use_primary_if_pinned(entry[0].user_id)
+        return get_credentials(entry[0])
+
+    async def aauthenticate_credentials(self, key):
+        """Асинхронный вариант authenticate_credentials."""
+        cache_key = get_token_cache_key(key)
+        entry = token_cache.get(cache_key)
+        if entry is None and settings.AUTH_TOKEN_SHARED_CACHE:
+            entry = await cache.aget(cache_key)
+            if entry is not None:
+                token_cache.set(cache_key, entry)
+        if entry is None or entry[1] != await aget_versions(
+            *get_version_keys(entry[0].user_id)
+        ):
+            token = await self.get_model().objects.select_related(
+                'user',
+            ).filter(key=key).afirst()
+            if token is None or not token.user.is_active:
+                raise AuthenticationFailed
+            entry = (
+                token, await aget_versions(*get_version_keys(token.user_id)),
+            )
+            token_cache.set(cache_key, entry)
+            if settings.AUTH_TOKEN_SHARED_CACHE:
+                await cache.aset(
+                    cache_key, entry, constants.AUTH_TOKEN_CACHE_TTL,
+                )
+        await ause_primary_if_pinned(entry[0].user_id)
+        return get_credentials(entry[0])
+
+
+def get_credentials(token):
+    # Копии: запросы не должны делить изменяемые объекты из кеша.
+    token = copy(token)
+    token.user = user = copy(token.user)
+    # Счётчики в кеше могли устареть: они меняются без смены версии
+    # пользователя. Отложенные поля читаются из базы при обращении.
+    for name in user.counter_fields:
+        user.__dict__.pop(user._meta.get_field(name).attname, None)
+    return user, token
+
+
+async def aauthenticate(request):
+    """Пользователь по заголовку Authorization без перехода в поток.
+
+    Повторяет проверки CachedTokenAuthentication; None означает, что
+    запрос нужно передать синхронному представлению, которое вернёт ошибку.
+    """
+    auth = get_authorization_header(request).split()
+    if not auth:
+        return AnonymousUser()
+    authentication = CachedTokenAuthentication()
+    if auth[0].lower() != authentication.keyword.lower().encode() or (
+        len(auth) != 2
+    ):
+        return None
+    try:
+        user, _ = await authentication.aauthenticate_credentials(
+            auth[1].decode(),
+        )
+    except (UnicodeError, AuthenticationFailed):
+        return None
+    return user
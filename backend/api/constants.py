@@ -3,3 +3,48 @@ VERTICAL_INDENT = 28
 
 MAX_COLUMN_COUNT = 60
 MAX_ROW_COUNT = 28
+
+FONT_NAME = 'DejaVuSerif'
+FONT_FILENAME = 'DejaVuSerif.ttf'
+
+PDF_CACHE_TIMEOUT = 60 * 60 * 24
+PDF_WORKERS = 2
+
+SHOPPING_CART_FILENAME = 'shopping_cart'
+SHOPPING_CART_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+}
+STREAM_CHUNK_SIZE = 2000
+
+# Больший каталог ингредиентов не держится в памяти процесса, поиск
+# идёт в базе. Поиск по названию в обоих случаях возвращает не больше
+# INGREDIENT_SEARCH_LIMIT строк.
+INGREDIENT_INDEX_MAX_SIZE = 100_000
+INGREDIENT_SEARCH_LIMIT = 100
+
+BULK_MAX_RECIPES = 100
+# Наибольшее значение первичного ключа bigint.
+MAX_ID = 2 ** 63 - 1
+
+AUTH_TOKEN_CACHE_SIZE = 10_000
+AUTH_TOKEN_CACHE_TTL = 60 * 5
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+REPRESENTATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+BASE64_CHUNK_SIZE = 64 * 1024
+
+METRICS_TIME_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+METRICS_FLUSH_INTERVAL = 1
+
+# После записи клиент читает с основной БД, пока реплики догоняют её.
+PRIMARY_DATABASE_COOKIE = 'db_primary'
+PRIMARY_DATABASE_PIN_TIME = 10
+REPLICA_PATH_PREFIXES = ('/api/', '/SL/')
@@ -0,0 +1,84 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .constants import PRIMARY_DATABASE_PIN_TIME
+from food.versions import cache, get_cache_key
+
+# База для чтения в текущем запросе; None — основная.
+read_database = ContextVar('read_database', default=None)
+
+
+def choose_replica():
+    """Случайная реплика для запроса или None, если реплик нет."""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(list(settings.DATABASE_REPLICAS))
+
+
+def use_primary_if_changed(versions):
+    """Чтение с основной базы, если данные менялись недавно.
+
+    Реплика могла ещё не получить изменение, а ответ закешируется под
+    новой версией и останется устаревшим до следующего изменения.
+    """
+    if read_database.get() is not None and (
+        time.time_ns() - max(versions) < PRIMARY_DATABASE_PIN_TIME * 10 ** 9
+    ):
+        read_database.set(None)
+
+
+def get_pin_key(user_id):
+    return get_cache_key('primary', user_id)
+
+
+def pin_primary(user_id):
+    """Чтение с основной базы для пользователя после его записи.
+
+    Метка в общем кеше версий живёт PRIMARY_DATABASE_PIN_TIME и
+    действует и для клиентов API, не хранящих cookie.
+    """
+    cache.set(get_pin_key(user_id), True, PRIMARY_DATABASE_PIN_TIME)
+
+
+def use_primary_if_pinned(user_id):
+    if read_database.get() is not None and cache.get(get_pin_key(user_id)):
+        read_database.set(None)
+
+
+async def ause_primary_if_pinned(user_id):
+    """Асинхронный вариант use_primary_if_pinned."""
+    if read_database.get() is not None and await cache.aget(
+        get_pin_key(user_id),
+    ):
+        read_database.set(None)
+
+
+class ReplicaRouter:
+    """Чтение безопасных запросов API с реплики, всё остальное — с основной.
+
+    Реплику выбирает DatabaseRoutingMiddleware; запросы вне HTTP
+    (команды, тесты, фоновые задачи) работают с основной базой.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются из той же базы, что и объект.
+            return instance._state.db
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # После записи запрос дочитывает с основной базы, чтобы видеть
+        # свои изменения.
+        read_database.set(None)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему репликацией с основной базы.
+        return db == 'default'
@@ -1,13 +1,198 @@
 import base64
+import binascii
+import re
+import tempfile
 
-from django.core.files.base import ContentFile
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
 from rest_framework.serializers import ImageField
 
+from . import constants
+from food.images import get_image_variants
+
+BASE64_SEPARATOR = ';base64,'
+NOT_BASE64_SYMBOLS = re.compile('[^A-Za-z0-9+/=]')
+
+
+def decode_base64_to_file(data, start, name):
+    """Декодирует base64 частями во временный файл на диске.
+
+    Как и b64decode, пропускает символы вне алфавита base64 (например,
+    переносы строк); остаток части, не кратный четырём символам,
+    переносится в следующую.
+    """
+    file = tempfile.TemporaryFile()
+    rest = ''
+    size = 0
+    try:
+        for chunk_start in range(
+                start, len(data), constants.BASE64_CHUNK_SIZE,
+        ):
+            chunk = rest + NOT_BASE64_SYMBOLS.sub(
+                '', data[chunk_start:chunk_start + constants.BASE64_CHUNK_SIZE]
+            )
+            end = len(chunk) - len(chunk) % 4
+            rest = chunk[end:]
+            size += file.write(base64.b64decode(chunk[:end]))
+            if size > constants.MAX_IMAGE_SIZE:
+                raise serializers.ValidationError(
+                    'Размер изображения не должен превышать '
+                    f'{constants.MAX_IMAGE_SIZE // 1024 // 1024} МБ.'
+                )
+        if rest:
+            raise binascii.Error('Неполная группа символов base64.')
+    except (binascii.Error, ValueError):
+        file.close()
+        raise serializers.ValidationError('Некорректная строка base64.')
+    except serializers.ValidationError:
+        file.close()
+        raise
+    file.seek(0)
+    return File(file, name=name)
+
+
+def check_image_dimensions(file):
+    try:
+        with Image.open(file) as image:
+            pixels = image.width * image.height
+    except Image.DecompressionBombError:
+        pixels = None
+    except OSError:
+        return
+    finally:
+        file.seek(0)
+    if pixels is None or pixels > constants.MAX_IMAGE_PIXELS:
+        raise serializers.ValidationError(
+            'Разрешение изображения не должно превышать '
+            f'{constants.MAX_IMAGE_PIXELS} пикселей.'
+        )
+
 
 class Base64ImageField(ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            header_end = data.find(BASE64_SEPARATOR)
+            if header_end == -1:
+                self.fail('invalid_image')
+            ext = data[:header_end].split('/')[-1]
+            data = decode_base64_to_file(
+                data, header_end + len(BASE64_SEPARATOR), 'temp.' + ext,
+            )
+            check_image_dimensions(data)
         return super().to_internal_value(data)
+
+
+class ImageVariantField(Base64ImageField):
+    """Адрес уменьшенной копии изображения или оригинала, если копия
+    ещё не готова."""
+
+    def __init__(self, variant=None, image_format='webp', **kwargs):
+        self.variant = variant
+        self.image_format = image_format
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        files = get_image_variants(value.instance) if value else {}
+        name = files.get(self.variant, {}).get(self.image_format)
+        if name is None:
+            return super().to_representation(value)
+        return build_url(self.context, value.storage.url(name))
+
+
+class ImageVariantsField(serializers.Field):
+    """Адреса всех уменьшенных копий изображения по размерам и форматам."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', 'image')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return {}
+        return {
+            variant: {
+                image_format: build_url(self.context, value.storage.url(name))
+                for image_format, name in formats.items()
+            }
+            for variant, formats in get_image_variants(value.instance).items()
+        }
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, находящий объекты списка одним запросом.
+
+    Ключи загружаются заранее через preload: полем с many=True или
+    BatchedListSerializer для вложенных сериализаторов. Ошибки для
+    отдельных ключей те же, что у PrimaryKeyRelatedField.
+    """
+
+    def __init__(self, **kwargs):
+        self.preloaded = None
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_pk(self, data):
+        if isinstance(data, bool):
+            raise TypeError
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            raise ValueError
+
+    def preload(self, values):
+        pks = set()
+        for value in values:
+            try:
+                pks.add(self.get_pk(value))
+            except (TypeError, ValueError):
+                continue
+        self.preloaded = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        if self.preloaded is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.get_pk(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return self.preloaded[pk]
+
+
+class BatchedManyRelatedField(ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child_relation.preload(data)
+        return super().to_internal_value(data)
+
+
+class BatchedListSerializer(serializers.ListSerializer):
+    """Список, загружающий объекты полей BatchedPrimaryKeyRelatedField
+    всех элементов одним запросом на поле."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for name, field in self.child.fields.items():
+                if isinstance(field, BatchedPrimaryKeyRelatedField):
+                    field.preload(
+                        item[name] for item in data
+                        if isinstance(item, dict) and name in item
+                    )
+        return super().to_internal_value(data)
+
+
+def build_url(context, url):
+    request = context.get('request')
+    return request.build_absolute_uri(url) if request else url
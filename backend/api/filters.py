@@ -1,25 +1,68 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, FloatField, OuterRef
+from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
 
-from food.models import Ingredient, Recipe, Tag
-
-
-class IngredientFilter(filters.FilterSet):
-    name = filters.CharFilter(lookup_expr='istartswith')
-
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+from food.constants import SEARCH_CONFIG
+from food.models import Favorites, Recipe, ShoppingCart, Tag
 
 
 class RecipeFilter(filters.FilterSet):
-    is_favorited = filters.BooleanFilter()
-    is_in_shopping_cart = filters.BooleanFilter()
+    is_favorited = filters.BooleanFilter(method='filter_is_favorited')
+    is_in_shopping_cart = filters.BooleanFilter(
+        method='filter_is_in_shopping_cart',
+    )
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='filter_tags',
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
-        fields = ('author', 'is_favorited', 'is_in_shopping_cart', 'tags')
+        fields = (
+            'author', 'is_favorited', 'is_in_shopping_cart', 'tags', 'search',
+        )
         model = Recipe
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'), tag__in=value,
+                )
+            )
+        )
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch',
+        )
+        # ts_rank возвращает real, значение которого в курсоре после
+        # округления не совпадает с самим собой; double precision точен.
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query), FloatField(),
+            ),
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_added_by_user(queryset, Favorites, value)
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_added_by_user(queryset, ShoppingCart, value)
+
+    def filter_added_by_user(self, queryset, model, value):
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none() if value else queryset
+        added = Exists(
+            model.objects.filter(user=user, recipe=OuterRef('pk'))
+        )
+        return queryset.filter(added if value else ~added)
@@ -0,0 +1,96 @@
+from itertools import chain, islice
+from threading import Lock
+
+from django.db.models.functions import Collate, Lower
+from sortedcontainers import SortedList
+
+from . import constants
+from food.models import Ingredient
+from food.versions import get_version
+
+
+class IngredientIndex:
+    """Индекс ингредиентов процесса для поиска по началу названия.
+
+    Строки (lower(name), measurement_unit, id, name) хранятся отсортированными,
+    поиск по префиксу выполняется бинарным поиском. Индекс перестраивается
+    при изменении версии ингредиентов.
+
+    Каталог больше INGREDIENT_INDEX_MAX_SIZE в память не загружается,
+    и те же совпадения в том же порядке ищутся в базе.
+    """
+
+    def __init__(self):
+        self.items = SortedList()
+        self.version = None
+        self.lock = Lock()
+
+    def refresh(self):
+        version = get_version('ingredients')
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            ingredients = Ingredient.objects.values_list(
+                'pk', 'name', 'measurement_unit',
+            )
+            if ingredients.count() > constants.INGREDIENT_INDEX_MAX_SIZE:
+                self.items = None
+            else:
+                self.items = SortedList(
+                    (name.lower(), measurement_unit, pk, name)
+                    for pk, name, measurement_unit in ingredients.iterator()
+                )
+            self.version = version
+
+    def search(self, query=''):
+        self.refresh()
+        items = self.items
+        query = query.lower()
+        if items is None:
+            return self.search_database(query)
+        if not query:
+            return [self.to_representation(item) for item in items]
+        prefix_hits = []
+        for item in items.islice(items.bisect_left((query,))):
+            if not item[0].startswith(query):
+                break
+            prefix_hits.append(item)
+        substring_hits = (
+            item for item in items
+            if query in item[0] and not item[0].startswith(query)
+        )
+        return [
+            self.to_representation(item)
+            for item in islice(
+                chain(prefix_hits, substring_hits),
+                constants.INGREDIENT_SEARCH_LIMIT,
+            )
+        ]
+
+    def search_database(self, query):
+        """Совпадения в том же порядке, что у индекса процесса: сначала
+        по началу названия (индекс ingredient_name_prefix_idx), затем в
+        середине (ingredient_name_trigram_idx, если есть pg_trgm); внутри
+        групп по кодам символов названия в нижнем регистре."""
+        ingredients = Ingredient.objects.annotate(
+            key=Collate(Lower('name'), 'C'), lower_name=Lower('name'),
+        ).order_by(
+            'key', Collate('measurement_unit', 'C'), 'pk',
+        ).values_list('key', 'measurement_unit', 'pk', 'name')
+        limit = constants.INGREDIENT_SEARCH_LIMIT
+        hits = list(ingredients.filter(key__startswith=query)[:limit])
+        if query and len(hits) < limit:
+            hits += ingredients.filter(lower_name__contains=query).exclude(
+                key__startswith=query,
+            )[:limit - len(hits)]
+        return [self.to_representation(item) for item in hits]
+
+    @staticmethod
+    def to_representation(item):
+        _, measurement_unit, pk, name = item
+        return {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,141 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from food.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузка запущенного сервера параллельными клиентами: запросы '
+        'в секунду и задержки при каждом уровне параллельности. Для '
+        'сравнения режимов запустите сервер с SERVER_MODE=wsgi и '
+        'SERVER_MODE=asgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://localhost:8000',
+            help='Адрес сервера.',
+        )
+        parser.add_argument(
+            '--concurrency', nargs='+', type=int, default=[50, 200, 1000],
+            help='Количество одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность замера для каждого уровня, секунд.',
+        )
+        parser.add_argument(
+            '--paths', nargs='+',
+            help='Адреса для запросов по кругу. По умолчанию список и '
+                 'страница рецепта, теги, ингредиенты и короткая ссылка.',
+        )
+        parser.add_argument(
+            '--token', help='Токен для заголовка Authorization.',
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Поддерживаются только адреса http://.')
+        paths = options['paths'] or self.get_default_paths()
+        headers = f'Host: {url.netloc}\r\nAccept: application/json\r\n'
+        if options['token']:
+            headers += f'Authorization: Token {options["token"]}\r\n'
+        requests = [
+            f'GET {path} HTTP/1.1\r\n{headers}\r\n'.encode()
+            for path in paths
+        ]
+        for concurrency in options['concurrency']:
+            latencies, errors, elapsed = asyncio.run(
+                self.run_clients(
+                    url.hostname, url.port or 80, requests, concurrency,
+                    options['duration'],
+                )
+            )
+            self.stdout.write(self.format_result(
+                concurrency, latencies, errors, elapsed,
+            ))
+
+    def get_default_paths(self):
+        recipe = Recipe.objects.values('pk', 'short_link').first()
+        if recipe is None:
+            raise CommandError('Нет рецептов; передайте адреса в --paths.')
+        return [
+            '/api/recipes/',
+            f'/api/recipes/{recipe["pk"]}/',
+            '/api/tags/',
+            '/api/ingredients/?name=%D1%81',
+            f'/SL/{recipe["short_link"]}/',
+        ]
+
+    async def run_clients(self, host, port, requests, concurrency, duration):
+        latencies, errors = [], []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            self.run_client(
+                host, port, requests, number, deadline, latencies, errors,
+            )
+            for number in range(concurrency)
+        ))
+        return latencies, errors, time.perf_counter() - start
+
+    async def run_client(
+            self, host, port, requests, number, deadline, latencies, errors,
+    ):
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            request = requests[number % len(requests)]
+            number += 1
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                status, keep_alive = await self.read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError) as error:
+                errors.append(type(error).__name__)
+                status, keep_alive = None, False
+            else:
+                if status < 400:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors.append(str(status))
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def read_response(self, reader):
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if 'content-length' not in headers:
+            raise ValueError('Ответ без Content-Length.')
+        await reader.readexactly(int(headers['content-length']))
+        return status, headers.get('connection') != 'close'
+
+    def format_result(self, concurrency, latencies, errors, elapsed):
+        if len(latencies) < 2:
+            return (
+                f'{concurrency} клиентов: нет успешных ответов, '
+                f'ошибок {len(errors)}'
+            )
+        percentiles = statistics.quantiles(latencies, n=100)
+        return (
+            f'{concurrency} клиентов: {len(latencies) / elapsed:.0f} '
+            'запросов/с, задержка '
+            f'p50 {percentiles[49] * 1000:.1f} мс, '
+            f'p95 {percentiles[94] * 1000:.1f} мс, '
+            f'p99 {percentiles[98] * 1000:.1f} мс, '
+            f'ошибок {len(errors)}'
+        )
@@ -0,0 +1,77 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import RecipeViewSet
+from food.models import Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from food.versions import bump_version
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер времени скачивания списка покупок без кеша и из кеша. '
+        'Тестовые данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 100, 1000],
+            help='Количество ингредиентов в списке покупок.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество замеров для каждого размера.',
+        )
+
+    def handle(self, *args, **options):
+        view = RecipeViewSet.as_view({'get': 'download_shopping_cart'})
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = self.create_shopping_cart(size)
+                cold, warm = [], []
+                for _ in range(options['repeat']):
+                    bump_version('shopping_cart', user.pk)
+                    cold.append(self.download(view, user))
+                    warm.append(self.download(view, user))
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f'{size} ингредиентов: '
+                f'без кеша {statistics.median(cold):.1f} мс, '
+                f'из кеша {statistics.median(warm):.1f} мс'
+            )
+
+    def create_shopping_cart(self, size):
+        prefix = uuid.uuid4().hex
+        user = User.objects.create(
+            email=f'{prefix}@benchmark.local', username=prefix,
+        )
+        recipe = Recipe.objects.create(
+            author=user, name=prefix, image='recipes/benchmark.png',
+            text=prefix, cooking_time=1,
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'{prefix} {number}', measurement_unit='г')
+            for number in range(size)
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        return user
+
+    def download(self, view, user):
+        request = APIRequestFactory().get(
+            '/api/recipes/download_shopping_cart/',
+        )
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        view(request)
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,240 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from hmac import compare_digest
+from ipaddress import ip_address, ip_network
+from pathlib import Path
+from threading import Lock, Timer
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import constants
+
+# Гистограммы: имя, описание, границы корзин.
+HISTOGRAMS = (
+    (
+        'foodgram_request_duration_seconds', 'Время обработки запроса.',
+        constants.METRICS_TIME_BUCKETS,
+    ),
+    (
+        'foodgram_db_duration_seconds', 'Время запросов к БД.',
+        constants.METRICS_TIME_BUCKETS,
+    ),
+    (
+        'foodgram_db_queries', 'Число запросов к БД.',
+        constants.METRICS_QUERY_BUCKETS,
+    ),
+    (
+        'foodgram_serialize_duration_seconds', 'Время сериализации.',
+        constants.METRICS_TIME_BUCKETS,
+    ),
+    (
+        'foodgram_render_duration_seconds', 'Время отрисовки ответа.',
+        constants.METRICS_TIME_BUCKETS,
+    ),
+)
+
+request_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Замеры одного запроса.
+
+    Хранится в контекстной переменной, которая копируется в потоки
+    sync_to_async, поэтому замеры синхронного кода и асинхронного ORM
+    попадают в один объект.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.active = set()
+        self.queries = 0
+
+    def get_server_timing(self, total):
+        metrics = [
+            f'db;dur={self.durations.get("db", 0) * 1000:.1f};'
+            f'desc="{self.queries} queries"'
+        ]
+        metrics += [
+            f'{phase};dur={self.durations[phase] * 1000:.1f}'
+            for phase in ('serialize', 'render') if phase in self.durations
+        ]
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def get_observations(self, total):
+        return {
+            'foodgram_request_duration_seconds': total,
+            'foodgram_db_duration_seconds': self.durations.get('db', 0),
+            'foodgram_db_queries': self.queries,
+            'foodgram_serialize_duration_seconds': (
+                self.durations.get('serialize', 0)
+            ),
+            'foodgram_render_duration_seconds': (
+                self.durations.get('render', 0)
+            ),
+        }
+
+
+@contextmanager
+def timed(phase):
+    """Добавляет время блока к фазе текущего запроса.
+
+    Вложенные замеры той же фазы не учитываются повторно.
+    """
+    timings = request_timings.get()
+    if timings is None or phase in timings.active:
+        yield
+        return
+    timings.active.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[phase] += time.perf_counter() - start
+        timings.active.discard(phase)
+
+
+def record_query(execute, sql, params, many, context):
+    timings = request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.queries += 1
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrument_connection(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """Время построения data сериализатора верхнего уровня."""
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class MetricsStore:
+    """Гистограммы процесса, периодически сохраняемые в файл.
+
+    Каждый процесс пишет свой файл в METRICS_DIR; /metrics суммирует
+    файлы всех воркеров.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / f'{os.getpid()}-{uuid4().hex}.json'
+        self.histograms = {}
+        self.lock = Lock()
+        self.flush_timer = None
+
+    def observe(self, view, observations):
+        with self.lock:
+            for name, _, buckets in HISTOGRAMS:
+                value = observations[name]
+                counts = self.histograms.setdefault(
+                    (name, view), [0] * (len(buckets) + 2),
+                )
+                counts[next(
+                    (i for i, bound in enumerate(buckets) if value <= bound),
+                    len(buckets),
+                )] += 1
+                counts[-1] += value
+            if self.flush_timer is None:
+                # Файл пишется в фоне не чаще раза в интервал и только
+                # после новых замеров.
+                self.flush_timer = Timer(
+                    constants.METRICS_FLUSH_INTERVAL, self.flush,
+                )
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+    def flush(self):
+        with self.lock:
+            self.flush_timer = None
+            data = [
+                [name, view, counts]
+                for (name, view), counts in self.histograms.items()
+            ]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary_path = self.path.with_suffix('.tmp')
+            temporary_path.write_text(json.dumps(data))
+            os.replace(temporary_path, self.path)
+
+    def collect(self):
+        """Сумма гистограмм всех процессов."""
+        self.flush()
+        histograms = {}
+        for path in self.directory.glob('*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, view, counts in data:
+                total = histograms.setdefault((name, view), [0] * len(counts))
+                for i, count in enumerate(counts):
+                    total[i] += count
+        return histograms
+
+
+@cache
+def get_process_store(pid):
+    return MetricsStore(settings.METRICS_DIR)
+
+
+def get_store():
+    # После fork процесс начинает свои гистограммы и свой файл.
+    return get_process_store(os.getpid())
+
+
+def render_metrics():
+    """Гистограммы в текстовом формате Prometheus."""
+    histograms = get_store().collect()
+    lines = []
+    for name, description, buckets in HISTOGRAMS:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for (metric, view), counts in sorted(histograms.items()):
+            if metric != name:
+                continue
+            labels = f'view="{view}"'
+            cumulative = 0
+            for bound, count in zip(
+                    [*map(str, buckets), '+Inf'], counts[:-1],
+            ):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_sum{{{labels}}} {counts[-1]}')
+            lines.append(f'{name}_count{{{labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def is_metrics_client(request):
+    """Разрешён ли запрос к /metrics: по токену или адресу клиента."""
+    token = settings.METRICS_TOKEN
+    if token and compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}',
+    ):
+        return True
+    try:
+        address = ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
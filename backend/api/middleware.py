@@ -0,0 +1,126 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import constants
+from .db_routers import choose_replica, pin_primary, read_database
+from .metrics import RequestTimings, get_store, request_timings
+
+
+def get_view_name(request):
+    """Имя представления для меток: Класс.действие для DRF."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    view = match.func
+    view_class = getattr(view, 'cls', None) or getattr(
+        view, 'view_class', None,
+    )
+    if view_class is None:
+        return match.view_name or view.__name__
+    action = getattr(view, 'actions', {}).get(request.method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+class MetricsMiddleware:
+    """Замеры запроса: гистограммы для /metrics и заголовок Server-Timing
+    при SERVER_TIMING.
+
+    Работает и в синхронном, и в асинхронном режиме, чтобы под ASGI
+    не переводить асинхронные представления в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = request_timings.set(RequestTimings())
+        try:
+            return self.finish(request, self.get_response(request))
+        finally:
+            request_timings.reset(token)
+
+    async def __acall__(self, request):
+        token = request_timings.set(RequestTimings())
+        try:
+            return self.finish(request, await self.get_response(request))
+        finally:
+            request_timings.reset(token)
+
+    def finish(self, request, response):
+        timings = request_timings.get()
+        total = time.perf_counter() - timings.start
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.get_server_timing(total)
+        get_store().observe(
+            get_view_name(request), timings.get_observations(total),
+        )
+        return response
+
+
+class DatabaseRoutingMiddleware:
+    """Выбор базы для чтения на время запроса.
+
+    GET и HEAD к API и коротким ссылкам читают с реплики. После
+    изменяющего запроса клиент получает cookie, а пользователь — метку
+    pin_primary, и на время PRIMARY_DATABASE_PIN_TIME его чтения идут в
+    основную базу, чтобы он видел свои изменения, пока реплики отстают.
+    Метку проверяет аутентификация по токену.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = read_database.set(self.get_read_database(request))
+        try:
+            return self.finish(request, self.get_response(request))
+        finally:
+            read_database.reset(token)
+
+    async def __acall__(self, request):
+        token = read_database.set(self.get_read_database(request))
+        try:
+            return self.finish(request, await self.get_response(request))
+        finally:
+            read_database.reset(token)
+
+    def get_read_database(self, request):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or constants.PRIMARY_DATABASE_COOKIE in request.COOKIES
+            or not request.path.startswith(constants.REPLICA_PATH_PREFIXES)
+        ):
+            return None
+        return choose_replica()
+
+    def finish(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                constants.PRIMARY_DATABASE_COOKIE, '1',
+                max_age=constants.PRIMARY_DATABASE_PIN_TIME,
+                httponly=True, samesite='Lax',
+            )
+            user = getattr(request, 'user', None)
+            if settings.DATABASE_REPLICAS and user and user.is_authenticated:
+                pin_primary(user.pk)
+        return response
@@ -0,0 +1,148 @@
+from functools import wraps
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .authentication import aauthenticate
+from .constants import RESPONSE_CACHE_TIMEOUT
+from .db_routers import use_primary_if_changed
+from .renderers import JSONRenderer
+from food.versions import aget_versions, get_cache_key, get_versions
+
+
+class VersionedCacheMixin:
+    """Условные GET и кеширование ответов list и retrieve.
+
+    ETag и ключ кеша строятся из адреса запроса и версий данных,
+    которые возвращает get_cache_versions, поэтому любое изменение данных
+    делает старые ответы недействительными без явной очистки кеша.
+    """
+
+    cache_per_user = False
+
+    def get_version_keys(self):
+        raise NotImplementedError
+
+    def get_cache_versions(self):
+        return get_versions(*self.get_version_keys())
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs,
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        user_id, versions = getattr(request, 'cache_versions', (None, None))
+        if versions is None or user_id != request.user.pk:
+            versions = self.get_cache_versions()
+        if versions is None:
+            return handler(request, *args, **kwargs)
+        fingerprint, etag, last_modified = self.get_validators(
+            request, versions,
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            cache_key = get_cache_key('response', fingerprint)
+            data = cache.get(cache_key)
+            if data is None:
+                use_primary_if_changed(versions)
+                response = handler(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(
+                        cache_key, response.data, RESPONSE_CACHE_TIMEOUT,
+                    )
+            else:
+                response = Response(data)
+        return self.add_cache_headers(response, etag, last_modified)
+
+    def get_validators(self, request, versions):
+        user_id = request.user.pk if self.cache_per_user else None
+        fingerprint = md5(
+            repr((request.build_absolute_uri(), user_id, versions)).encode()
+        ).hexdigest()
+        return fingerprint, quote_etag(fingerprint), max(versions) // 10 ** 9
+
+    def add_cache_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if self.cache_per_user:
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        """При ASYNC_VIEWS list и retrieve отдаются асинхронным
+        представлением: ответы из кеша и 304 обходятся без потоков,
+        остальные запросы передаются синхронному представлению DRF."""
+        view = super().as_view(actions, **initkwargs)
+        action = actions.get('get')
+        if not settings.ASYNC_VIEWS or action not in ('list', 'retrieve'):
+            return view
+        sync_view = sync_to_async(view)
+
+        @wraps(view)
+        async def async_view(request, *args, **kwargs):
+            response = None
+            if request.method == 'GET':
+                response = await cls(**initkwargs).aget_cached_response(
+                    action, request, **kwargs,
+                )
+            if response is None:
+                response = await sync_view(request, *args, **kwargs)
+            return response
+
+        return async_view
+
+    async def aget_cache_versions(self):
+        return await aget_versions(*self.get_version_keys())
+
+    async def aget_cached_response(self, action, request, **kwargs):
+        """Ответ из кеша или None, если нужен синхронный обработчик.
+
+        get_version_keys и aget_cache_versions получают здесь HttpRequest
+        вместо Request DRF.
+        """
+        if (
+            'format' in request.GET
+            or 'text/html' in request.headers.get('Accept', '')
+        ):
+            return None
+        user = await aauthenticate(request)
+        if user is None:
+            return None
+        request.user = user
+        self.action, self.request, self.kwargs = action, request, kwargs
+        versions = await self.aget_cache_versions()
+        if versions is None:
+            return None
+        # Версии уже получены и пригодятся синхронному обработчику.
+        request.cache_versions = (user.pk, versions)
+        fingerprint, etag, last_modified = self.get_validators(
+            request, versions,
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            data = await cache.aget(get_cache_key('response', fingerprint))
+            if data is None:
+                return None
+            response = HttpResponse(
+                JSONRenderer().render(data), content_type='application/json',
+            )
+            patch_vary_headers(response, ('Accept',))
+        return self.add_cache_headers(response, etag, last_modified)
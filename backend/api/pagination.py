@@ -1,5 +1,134 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class PageNumberLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(CursorPagination):
+    """Постраничный вывод по ключу сортировки без COUNT(*) и OFFSET.
+
+    Страница начинается после строки, значения полей ordering которой
+    переданы в непрозрачном курсоре. Порядок задаёт атрибут
+    cursor_ordering представления; последнее поле должно быть уникальным.
+    Поля порядка могут быть аннотациями запроса.
+    """
+
+    page_size_query_param = 'limit'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [
+            getattr(last, field.lstrip('-')) for field in self.ordering
+        ]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(position),
+        )
+
+    def get_position_filter(self, position):
+        """Строки после позиции курсора.
+
+        Условие (a < x) OR (a = x AND b < y) строится из обычных Q.
+        Диапазон по первому полю добавляется к нему отдельно, чтобы
+        PostgreSQL начинал чтение индекса с позиции курсора.
+        """
+        names = [field.lstrip('-') for field in self.ordering]
+        position_filter = Q()
+        equal = {}
+        for field, name, value in zip(self.ordering, names, position):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            position_filter |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        first_lookup = 'lte' if self.ordering[0].startswith('-') else 'gte'
+        return Q(**{f'{names[0]}__{first_lookup}': position[0]}) & (
+            position_filter
+        )
+
+    def get_previous_link(self):
+        return None
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, default=str).encode()
+        return urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, request, queryset):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return [
+                self.get_ordering_field(queryset, field).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (BinasciiError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_ordering_field(self, queryset, field):
+        name = field.lstrip('-')
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+
+class PageNumberOrCursorPagination(PageNumberLimitPagination):
+    """Номера страниц по умолчанию, KeysetPagination при параметре cursor."""
+
+    keyset_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset_paginator = KeysetPagination()
+        return self.keyset_paginator.paginate_queryset(
+            queryset, request, view,
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
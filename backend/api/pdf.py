@@ -0,0 +1,63 @@
+import io
+from functools import cache
+from typing import Any, Dict, Iterable
+
+from django.conf import settings
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfgen.textobject import PDFTextObject
+
+from . import constants
+
+
+def start_page(file: Canvas) -> tuple[PDFTextObject, list]:
+    page = file.beginText(
+        constants.HORIZONTAL_INDENT * cm, constants.VERTICAL_INDENT * cm,
+    )
+    lines = []
+    return page, lines
+
+
+def finish_page(
+        page: PDFTextObject, lines: list, file: Canvas,
+) -> tuple[PDFTextObject, Canvas]:
+    page.textLines(lines)
+    file.drawText(page)
+    file.showPage()
+    return page, file
+
+
+@cache
+def register_font() -> None:
+    pdfmetrics.registerFont(
+        TTFont(
+            constants.FONT_NAME,
+            settings.BASE_DIR / 'fonts' / constants.FONT_FILENAME,
+        )
+    )
+
+
+def render_pdf(data: Dict[Any, Iterable]) -> bytes:
+    buffer = io.BytesIO()
+    register_font()
+    file = Canvas(
+        filename=buffer,
+        initialFontName=constants.FONT_NAME,
+        initialFontSize=16,
+        initialLeading=1 * cm,
+    )
+    page, lines = start_page(file)
+    for key, value in data.items():
+        line = f'- {key}: {" ".join(map(str, value))}'
+        for row_start in range(0, len(line), constants.MAX_COLUMN_COUNT):
+            lines.append(
+                line[row_start:row_start + constants.MAX_COLUMN_COUNT]
+            )
+            if len(lines) >= constants.MAX_ROW_COUNT:
+                page, file = finish_page(page, lines, file)
+                page, lines = start_page(file)
+    page, file = finish_page(page, lines, file)
+    file.save()
+    return buffer.getvalue()
@@ -0,0 +1,17 @@
+from rest_framework import renderers
+
+from .metrics import timed
+
+
+class TimedRendererMixin:
+    def render(self, *args, **kwargs):
+        with timed('render'):
+            return super().render(*args, **kwargs)
+
+
+class JSONRenderer(TimedRendererMixin, renderers.JSONRenderer):
+    pass
+
+
+class BrowsableAPIRenderer(TimedRendererMixin, renderers.BrowsableAPIRenderer):
+    pass
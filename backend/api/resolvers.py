@@ -0,0 +1,46 @@
+class SubscriptionResolver:
+    """Подписки текущего пользователя, общие для сериализаторов запроса.
+
+    Подписки на авторов загружаются одним запросом для всех сериализуемых
+    объектов или берутся из аннотаций queryset.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.subscribed = {}
+
+    @classmethod
+    def for_request(cls, request):
+        resolver = getattr(request, '_subscription_resolver', None)
+        if resolver is None:
+            resolver = cls(request.user)
+            request._subscription_resolver = resolver
+        return resolver
+
+    def add(self, author_id, is_subscribed):
+        self.subscribed[author_id] = is_subscribed
+
+    def load(self, author_ids):
+        if not self.user.is_authenticated:
+            return
+        missing = {
+            author_id for author_id in author_ids
+            if author_id not in self.subscribed
+        }
+        missing.discard(self.user.pk)
+        if not missing:
+            return
+        followed = set(
+            self.user.subscriptions.filter(
+                author__in=missing,
+            ).values_list('author', flat=True)
+        )
+        for author_id in missing:
+            self.subscribed[author_id] = author_id in followed
+
+    def is_subscribed(self, author_id):
+        if not self.user.is_authenticated or author_id == self.user.pk:
+            return False
+        if author_id not in self.subscribed:
+            self.load((author_id,))
+        return self.subscribed[author_id]
@@ -1,31 +1,69 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db.models.manager import BaseManager
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from .fields import Base64ImageField
-from food.models import Ingredient, Recipe, RecipeIngredient, Tag
+from .constants import (
+    BULK_MAX_RECIPES, MAX_ID, REPRESENTATION_CACHE_TIMEOUT,
+)
+from .fields import (
+    Base64ImageField, BatchedListSerializer, BatchedPrimaryKeyRelatedField,
+    ImageVariantField, ImageVariantsField,
+)
+from .metrics import TimedSerializerMixin
+from .resolvers import SubscriptionResolver
+from food.models import (
+    Ingredient, Recipe, RecipeIngredient, ShoppingListItem, Tag,
+)
+from food.shopping_list import (
+    add_ingredients_to_lists, remove_ingredients_from_lists,
+)
+from food.versions import get_cache_key, get_versions
 
 User = get_user_model()
 
 
-class FoodgramUserSerializer(UserSerializer):
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class FoodgramUserListSerializer(
+        TimedSerializerMixin, serializers.ListSerializer,
+):
+    def to_representation(self, data):
+        if isinstance(data, BaseManager):
+            data = data.all()
+        request = self.context.get('request')
+        if request:
+            SubscriptionResolver.for_request(request).load(
+                user.pk for user in data if not hasattr(user, 'is_subscribed')
+            )
+        return super().to_representation(data)
+
+
+class FoodgramUserSerializer(TimedSerializerMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ('avatar', 'is_subscribed')
+        list_serializer_class = FoodgramUserListSerializer
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and request.user.subscriptions.filter(author=obj).exists()
-        )
+        if not request:
+            return False
+        return SubscriptionResolver.for_request(request).is_subscribed(obj.pk)
 
 
-class UserAvatarSerializer(serializers.ModelSerializer):
+class UserAvatarSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer,
+):
     avatar = Base64ImageField()
 
     class Meta:
@@ -38,14 +76,15 @@ class UserAvatarSerializer(serializers.ModelSerializer):
         return value
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'name', 'slug')
         model = Tag
+        list_serializer_class = TimedListSerializer
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
+    id = BatchedPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), source='ingredient',
     )
     name = serializers.SlugRelatedField(
@@ -58,9 +97,45 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'name', 'amount', 'measurement_unit')
         model = RecipeIngredient
+        list_serializer_class = BatchedListSerializer
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class ShoppingListItemSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer,
+):
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit',
+    )
+    amount = serializers.ReadOnlyField(source='total_amount')
+
+    class Meta:
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+        model = ShoppingListItem
+        list_serializer_class = TimedListSerializer
+
+
+class RecipeReadListSerializer(
+        TimedSerializerMixin, serializers.ListSerializer,
+):
+    def to_representation(self, data):
+        if isinstance(data, BaseManager):
+            data = data.all()
+        return self.child.to_representations(list(data))
+
+
+class RecipeReadSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer,
+):
+    """Рецепт с общей для всех пользователей частью из кеша.
+
+    Представление без полей, зависящих от пользователя, кешируется по id
+    рецепта, времени его изменения и версиям тегов, ингредиентов и профиля
+    автора. Поля is_favorited, is_in_shopping_cart и author.is_subscribed
+    подставляются после чтения из кеша.
+    """
+
     tags = TagSerializer(many=True)
     author = FoodgramUserSerializer()
     ingredients = RecipeIngredientSerializer(
@@ -69,17 +144,97 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     is_favorited = serializers.BooleanField(default=False)
     is_in_shopping_cart = serializers.BooleanField(default=False)
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time',
+            'is_in_shopping_cart', 'name', 'image', 'image_variants', 'text',
+            'cooking_time',
         )
         model = Recipe
+        list_serializer_class = RecipeReadListSerializer
 
+    def to_representation(self, instance):
+        return self.to_representations([instance])[0]
+
+    def to_representations(self, recipes):
+        subscribed = self.get_subscribed(recipes)
+        keys = self.get_cache_keys(recipes)
+        cached = cache.get_many(keys.values())
+        missing = [
+            recipe for recipe in recipes if keys[recipe.pk] not in cached
+        ]
+        if missing:
+            prefetch_related_objects(
+                missing,
+                'tags',
+                Prefetch(
+                    'ingredients_for',
+                    queryset=RecipeIngredient.objects.select_related(
+                        'ingredient',
+                    ),
+                ),
+            )
+            fresh = {}
+            for recipe in missing:
+                fresh[keys[recipe.pk]] = super().to_representation(recipe)
+            cache.set_many(fresh, REPRESENTATION_CACHE_TIMEOUT)
+            cached.update(fresh)
+        return [
+            self.add_user_fields(
+                cached[keys[recipe.pk]], recipe, subscribed(recipe.author_id),
+            ) for recipe in recipes
+        ]
 
-class RecipeWriteSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+    def get_cache_keys(self, recipes):
+        request = self.context.get('request')
+        base_url = request.build_absolute_uri('/') if request else ''
+        author_ids = sorted({recipe.author_id for recipe in recipes})
+        tags_version, ingredients_version, *author_versions = get_versions(
+            ('tags',),
+            ('ingredients',),
+            *(('user', author_id) for author_id in author_ids),
+        )
+        author_versions = dict(zip(author_ids, author_versions))
+        return {
+            recipe.pk: get_cache_key(
+                'recipe', type(self).__name__, base_url, recipe.pk,
+                recipe.updated_at.timestamp(), tags_version,
+                ingredients_version, author_versions[recipe.author_id],
+            ) for recipe in recipes
+        }
+
+    def get_subscribed(self, recipes):
+        request = self.context.get('request')
+        if not request:
+            return lambda author_id: False
+        resolver = SubscriptionResolver.for_request(request)
+        for recipe in recipes:
+            if hasattr(recipe, 'author_is_subscribed'):
+                resolver.add(recipe.author_id, recipe.author_is_subscribed)
+        resolver.load(recipe.author_id for recipe in recipes)
+        return resolver.is_subscribed
+
+    def add_user_fields(self, data, recipe, is_subscribed):
+        return {
+            **data,
+            'author': {**data['author'], 'is_subscribed': is_subscribed},
+            'is_favorited': getattr(recipe, 'is_favorited', False),
+            'is_in_shopping_cart': getattr(
+                recipe, 'is_in_shopping_cart', False,
+            ),
+        }
+
+
+class RecipeListSerializer(RecipeReadSerializer):
+    image = ImageVariantField(variant='medium')
+
+
+class RecipeWriteSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer,
+):
+    tags = BatchedPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True,
     )
     ingredients = RecipeIngredientSerializer(
@@ -126,17 +281,47 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def add_tags_and_ingredients(self, recipe, tags, ingredients):
-        recipe.tags.set(tags)
-        ingredients_to_insert = [
-            RecipeIngredient(
-                recipe=recipe,
-                ingredient=ingredient['ingredient'],
-                amount=ingredient['amount'],
-            ) for ingredient in ingredients
+    def set_ingredients(self, recipe, ingredients, created=False):
+        """Изменение ингредиентов рецепта по разнице с сохранёнными.
+
+        Удаляются, обновляются и добавляются только изменившиеся строки.
+        """
+        amounts = {
+            ingredient['ingredient'].pk: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {} if created else {
+            row.ingredient_id: row for row in recipe.ingredients_for.all()
+        }
+        removed = [
+            row.pk for ingredient_id, row in current.items()
+            if ingredient_id not in amounts
         ]
-        recipe.ingredients_for.bulk_create(ingredients_to_insert)
-        return recipe
+        if removed:
+            # Списки покупок обновляют сигналы удаления.
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        changed = [
+            row for ingredient_id, row in current.items()
+            if amounts.get(ingredient_id, row.amount) != row.amount
+        ]
+        if changed:
+            remove_ingredients_from_lists(recipe.pk, [
+                (row.ingredient_id, row.amount) for row in changed
+            ])
+            for row in changed:
+                row.amount = amounts[row.ingredient_id]
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        added = RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount,
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        )
+        if not created:
+            add_ingredients_to_lists(recipe.pk, [
+                (row.ingredient_id, row.amount) for row in changed + added
+            ])
 
     @transaction.atomic
     def create(self, validated_data):
@@ -144,31 +329,57 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         validated_data['author'] = self.context['request'].user
         recipe = Recipe.objects.create(**validated_data)
-        return self.add_tags_and_ingredients(recipe, tags, ingredients)
+        recipe.tags.add(*tags)
+        self.set_ingredients(recipe, ingredients, created=True)
+        return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        instance.ingredients.clear()
-        instance = self.add_tags_and_ingredients(instance, tags, ingredients)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        # tag_ids и ingredient_amounts загружает представление вместе с
+        # рецептом; совпадающие с ними связи не меняются.
+        if tags is not None and {tag.pk for tag in tags} != set(
+            getattr(instance, 'tag_ids', ()),
+        ):
+            instance.tags.set(tags)
+        if ingredients is not None and {
+            ingredient['ingredient'].pk: ingredient['amount']
+            for ingredient in ingredients
+        } != {
+            row['ingredient']: row['amount']
+            for row in getattr(instance, 'ingredient_amounts', ())
+        }:
+            self.set_ingredients(instance, ingredients)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
         return RecipeReadSerializer(instance, context=self.context).data
 
 
-class RecipeMinifiedSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+class RecipeMinifiedSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer,
+):
+    image = ImageVariantField(variant='small')
+    image_variants = ImageVariantsField()
 
     class Meta:
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         model = Recipe
+        list_serializer_class = TimedListSerializer
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        allow_empty=False,
+        max_length=BULK_MAX_RECIPES,
+    )
 
 
 class SubscriptionSerializer(FoodgramUserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(FoodgramUserSerializer.Meta):
         fields = (
@@ -176,21 +387,12 @@ class SubscriptionSerializer(FoodgramUserSerializer):
         )
 
     def get_recipes(self, obj):
-        recipes_limit = self.context['request'].GET.get('recipes_limit')
-        if recipes_limit is not None:
-            try:
-                recipes_limit = int(recipes_limit)
-            except ValueError:
-                raise serializers.ValidationError(
-                    'recipes_limit должен быть int.')
-        queryset = obj.recipes.all()[:recipes_limit]
-        return RecipeMinifiedSerializer(queryset, many=True).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return RecipeMinifiedSerializer(obj.latest_recipes, many=True).data
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer,
+):
     class Meta:
         fields = ('id', 'name', 'measurement_unit')
         model = Ingredient
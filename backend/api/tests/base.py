@@ -0,0 +1,73 @@
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from food.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': alias,
+    }
+    for alias in ('default', 'versions')
+}
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(CACHES=CACHES, MEDIA_ROOT=MEDIA_ROOT)
+class RecipeTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', slug=f'tag{i}') for i in range(3)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(5)
+        )
+
+    def setUp(self):
+        self.clear_caches()
+        self.client = APIClient()
+
+    def clear_caches(self):
+        for alias in CACHES:
+            caches[alias].clear()
+
+    def create_recipes(self, count):
+        recipes = [
+            Recipe.objects.create(
+                author=self.user,
+                name=f'Рецепт {i}',
+                image='recipes/recipe.png',
+                text='Описание',
+                cooking_time=10,
+            )
+            for i in range(count)
+        ]
+        for recipe in recipes:
+            recipe.tags.set(self.tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=100,
+                )
+                for ingredient in self.ingredients
+            )
+        return recipes
@@ -0,0 +1,46 @@
+from rest_framework.authtoken.models import Token
+
+from .base import RecipeTestCase
+from api.authentication import CachedTokenAuthentication, token_cache
+from users.models import Subscription, User
+
+
+class CachedTokenAuthenticationTest(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.token = token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.follower = User.objects.create_user(
+            email='follower@example.com',
+            username='follower',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+
+    def test_cached_user_keeps_counters(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        Subscription.objects.create(author=self.user, follower=self.follower)
+        response = self.client.post(
+            '/api/users/set_password/',
+            {
+                'current_password': 'password-123',
+                'new_password': 'password-456-new',
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.followers_count, 1)
+
+    def test_counters_are_read_from_database(self):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+        Subscription.objects.create(author=self.user, follower=self.follower)
+        user, _ = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(
+            user.get_deferred_fields(), set(User.counter_fields),
+        )
+        self.assertEqual(user.followers_count, 1)
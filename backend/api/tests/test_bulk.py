@@ -0,0 +1,31 @@
+from .base import RecipeTestCase
+
+
+class RecipeBulkAdditionsTest(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.recipes = self.create_recipes(2)
+
+    def test_add_and_remove(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        for url in ('/api/recipes/favorite/', '/api/recipes/shopping_cart/'):
+            with self.subTest(url=url):
+                response = self.client.post(
+                    url, {'recipes': ids}, format='json',
+                )
+                self.assertEqual(response.status_code, 201)
+                response = self.client.delete(
+                    url, {'recipes': ids}, format='json',
+                )
+                self.assertEqual(response.status_code, 204)
+
+    def test_id_out_of_range(self):
+        for url in ('/api/recipes/favorite/', '/api/recipes/shopping_cart/'):
+            for method in ('post', 'delete'):
+                with self.subTest(url=url, method=method):
+                    response = getattr(self.client, method)(
+                        url, {'recipes': [10 ** 20]}, format='json',
+                    )
+                    self.assertEqual(response.status_code, 400)
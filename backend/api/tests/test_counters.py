@@ -0,0 +1,71 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from .base import RecipeTestCase
+from food.counters import update_counter
+from food.models import Favorites, Recipe
+from users.models import Subscription, User
+
+
+def get_image():
+    buffer = BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+class StoredCountersTest(RecipeTestCase):
+    """Сохранение модели не затирает счётчики, изменённые в базе."""
+
+    def setUp(self):
+        super().setUp()
+        self.follower = User.objects.create_user(
+            email='follower@example.com',
+            username='follower',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        self.recipe, = self.create_recipes(1)
+        self.client.force_authenticate(self.user)
+
+    def test_avatar_put(self):
+        Subscription.objects.create(author=self.user, follower=self.follower)
+        response = self.client.put(
+            '/api/users/me/avatar/', {'avatar': get_image()}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.followers_count, 1)
+        self.assertEqual(self.user.recipes_count, 1)
+
+    def test_recipe_patch(self):
+        Favorites.objects.create(user=self.follower, recipe=self.recipe)
+        response = self.client.patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            {
+                'name': 'Новое название',
+                'tags': [tag.pk for tag in self.tags],
+                'ingredients': [
+                    {'id': ingredient.pk, 'amount': 100}
+                    for ingredient in self.ingredients
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Новое название')
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_stale_instance_save(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        update_counter(Recipe, recipe.pk, 'in_carts_count', 1)
+        recipe.name = 'Новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.in_carts_count, 1)
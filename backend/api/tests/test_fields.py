@@ -0,0 +1,37 @@
+import base64
+import os
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from api import constants
+from api.fields import decode_base64_to_file
+
+
+class DecodeBase64Test(SimpleTestCase):
+
+    def setUp(self):
+        self.data = os.urandom(constants.BASE64_CHUNK_SIZE * 3)
+
+    def assert_decoded(self, encoded):
+        with decode_base64_to_file(encoded, 0, 'image.png') as file:
+            self.assertEqual(file.read(), self.data)
+
+    def test_plain(self):
+        self.assert_decoded(base64.b64encode(self.data).decode())
+
+    def test_line_wrapped(self):
+        encoded = base64.encodebytes(self.data).decode()
+        self.assert_decoded(encoded)
+        self.assert_decoded(encoded.replace('\n', '\r\n'))
+
+    def test_incomplete(self):
+        with self.assertRaises(ValidationError):
+            decode_base64_to_file('QUJD\nRA', 0, 'image.png')
+
+    def test_too_large(self):
+        encoded = base64.b64encode(
+            bytes(constants.MAX_IMAGE_SIZE + 1)
+        ).decode()
+        with self.assertRaises(ValidationError):
+            decode_base64_to_file(encoded, 0, 'image.png')
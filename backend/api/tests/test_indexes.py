@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base import RecipeTestCase
+from food.models import Favorites, ShoppingCart
+
+
+class RecipeFilterIndexesTest(RecipeTestCase):
+    """Фильтры списка рецептов выполняются по индексам.
+
+    Последовательное чтение запрещено планировщику, поэтому Seq Scan в
+    плане означает, что для запроса нет подходящего индекса.
+    """
+
+    def setUp(self):
+        super().setUp()
+        recipe, = self.create_recipes(1)
+        Favorites.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.client.force_authenticate(self.user)
+
+    def get_plans(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            for query in context.captured_queries:
+                cursor.execute('EXPLAIN ' + query['sql'])
+                plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+        return plans
+
+    def assert_no_seq_scans(self, url):
+        for plan in self.get_plans(url):
+            self.assertNotIn('Seq Scan', plan)
+
+    def test_filters(self):
+        for query in (
+            'tags=tag0&tags=tag1',
+            'is_favorited=1',
+            'is_favorited=0',
+            'is_in_shopping_cart=1',
+            f'author={self.user.pk}',
+            'search=Рецепт',
+            'tags=tag2&is_favorited=1&is_in_shopping_cart=1',
+        ):
+            with self.subTest(query=query):
+                self.clear_caches()
+                self.assert_no_seq_scans(f'/api/recipes/?{query}')
+
+    def test_cursor_position(self):
+        self.create_recipes(2)
+        response = self.client.get('/api/recipes/?cursor=&limit=1')
+        plans = self.get_plans(response.data['next'])
+        self.assertTrue(
+            any(
+                'Index Cond: (created_at <= ' in plan
+                for plan in plans
+            ),
+            plans,
+        )
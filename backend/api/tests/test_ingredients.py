@@ -0,0 +1,67 @@
+from unittest import mock
+
+from .base import RecipeTestCase
+from api import constants
+from food.models import Ingredient
+
+
+class IngredientSearchTest(RecipeTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in (
+                ('Молоко', 'мл'),
+                ('Молоко', 'г'),
+                ('молотый перец', 'г'),
+                ('Сухое молоко', 'г'),
+            )
+        )
+
+    def search(self, name):
+        response = self.client.get('/api/ingredients/', {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return [
+            (item['name'], item['measurement_unit']) for item in response.data
+        ]
+
+    def assert_search(self, name, expected):
+        """Одинаковый результат для каталога в памяти и в базе."""
+        for max_size in (constants.INGREDIENT_INDEX_MAX_SIZE, 1):
+            with (
+                self.subTest(max_size=max_size),
+                mock.patch.object(
+                    constants, 'INGREDIENT_INDEX_MAX_SIZE', max_size,
+                ),
+            ):
+                self.clear_caches()
+                self.assertEqual(self.search(name), expected)
+
+    def test_search(self):
+        self.assert_search('мол', [
+            ('Молоко', 'г'),
+            ('Молоко', 'мл'),
+            ('молотый перец', 'г'),
+            ('Сухое молоко', 'г'),
+        ])
+        self.assert_search('олок', [
+            ('Молоко', 'г'),
+            ('Молоко', 'мл'),
+            ('Сухое молоко', 'г'),
+        ])
+        self.assert_search('молот', [('молотый перец', 'г')])
+
+    @mock.patch('api.constants.INGREDIENT_SEARCH_LIMIT', 3)
+    def test_limit(self):
+        self.assert_search('мол', [
+            ('Молоко', 'г'),
+            ('Молоко', 'мл'),
+            ('молотый перец', 'г'),
+        ])
+        self.assert_search('о', [
+            ('Молоко', 'г'),
+            ('Молоко', 'мл'),
+            ('молотый перец', 'г'),
+        ])
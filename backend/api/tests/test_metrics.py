@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase, override_settings
+
+
+@override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8'], METRICS_TOKEN='')
+class MetricsAccessTest(SimpleTestCase):
+
+    def test_allowed_network(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='10.1.2.3')
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_address(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='192.168.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        response = self.client.get(
+            '/metrics',
+            REMOTE_ADDR='192.168.0.1',
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            '/metrics',
+            REMOTE_ADDR='192.168.0.1',
+            HTTP_AUTHORIZATION='Bearer wrong',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_no_server_timing(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='10.1.2.3')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='10.1.2.3')
+        self.assertIn('Server-Timing', response)
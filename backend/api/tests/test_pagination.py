@@ -0,0 +1,35 @@
+from urllib.parse import quote
+
+from .base import RecipeTestCase
+
+
+class RecipeCursorPaginationTest(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.create_recipes(3)
+
+    def get_all_pages(self, url):
+        names = []
+        for _ in range(10):
+            if url is None:
+                return names
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [recipe['name'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.fail('Курсор не продвигается.')
+
+    def test_list_search(self):
+        self.assertCountEqual(
+            self.get_all_pages(
+                '/api/recipes/?cursor=&limit=2&search=' + quote('Рецепт'),
+            ),
+            ['Рецепт 0', 'Рецепт 1', 'Рецепт 2'],
+        )
+
+    def test_feed_ignores_search(self):
+        self.get_all_pages(
+            '/api/recipes/feed/?limit=2&search=' + quote('Рецепт'),
+        )
@@ -0,0 +1,104 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base import RecipeTestCase
+from food.models import Recipe
+
+
+class RecipeQueriesTest(RecipeTestCase):
+    """Число запросов к базе не зависит от числа рецептов на странице."""
+
+    def assert_list_queries(self, num):
+        for recipes_count in (1, 6):
+            with self.subTest(recipes=recipes_count):
+                self.create_recipes(recipes_count)
+                self.clear_caches()
+                with self.assertNumQueries(num):
+                    response = self.client.get('/api/recipes/?limit=6')
+                self.assertEqual(response.status_code, 200)
+                Recipe.objects.all().delete()
+
+    def assert_detail_queries(self, num):
+        recipe, = self.create_recipes(1)
+        with self.assertNumQueries(num):
+            response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['ingredients']), 5)
+        self.assertEqual(len(response.data['tags']), 3)
+
+    def test_list_anonymous(self):
+        self.assert_list_queries(4)
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_list_queries(4)
+
+    def test_detail_anonymous(self):
+        self.assert_detail_queries(4)
+
+    def test_detail_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_detail_queries(4)
+
+    def test_cached_list(self):
+        self.create_recipes(6)
+        self.client.get('/api/recipes/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_patch(self):
+        recipe, = self.create_recipes(1)
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                {
+                    'name': 'Новое название',
+                    'tags': [tag.pk for tag in reversed(self.tags)],
+                    'ingredients': [
+                        {'id': ingredient.pk, 'amount': 100}
+                        for ingredient in self.ingredients
+                    ],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('UPDATE "food_recipe" '))
+        # Связи читаются вместе с рецептом и для ответа после его
+        # сохранения.
+        before_update = context.captured_queries[1:[
+            query['sql'] for query in context.captured_queries
+        ].index(writes[0])]
+        for query in before_update:
+            self.assertNotIn('food_recipe_tags', query['sql'])
+            self.assertNotIn('food_recipeingredient', query['sql'])
+
+    def test_changed_patch(self):
+        recipe, = self.create_recipes(1)
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(
+            f'/api/recipes/{recipe.pk}/',
+            {
+                'tags': [self.tags[0].pk],
+                'ingredients': [
+                    {'id': self.ingredients[0].pk, 'amount': 5},
+                    {'id': self.ingredients[1].pk, 'amount': 100},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(recipe.tags.values_list('pk', flat=True)),
+            [self.tags[0].pk],
+        )
+        self.assertEqual(
+            dict(recipe.ingredients_for.values_list('ingredient', 'amount')),
+            {self.ingredients[0].pk: 5, self.ingredients[1].pk: 100},
+        )
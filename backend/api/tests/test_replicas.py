@@ -0,0 +1,20 @@
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from .base import RecipeTestCase
+
+
+# Реплики нет в DATABASES: чтение с неё завершилось бы ошибкой.
+@override_settings(DATABASE_REPLICAS={'replica_0': {}})
+class ReadYourWritesTest(RecipeTestCase):
+
+    def test_token_client_without_cookies(self):
+        recipe, = self.create_recipes(1)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.client.post(f'/api/recipes/{recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.client.cookies.clear()
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_favorited'])
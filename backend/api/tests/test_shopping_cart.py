@@ -0,0 +1,24 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from .base import RecipeTestCase
+from food.models import ShoppingCart
+
+
+class ShoppingCartDownloadTest(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        recipe, = self.create_recipes(1)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.client.force_authenticate(self.user)
+
+    @override_settings(ASYNC_VIEWS=False)
+    @mock.patch('api.utils.get_pdf_executor')
+    def test_pdf_rendered_in_worker(self, get_pdf_executor):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        get_pdf_executor.assert_not_called()
@@ -1,82 +1,171 @@
-import io
-from typing import Any, Dict, Iterable
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from itertools import islice
+from multiprocessing import get_context
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator
 
-from django.db.models import QuerySet
-from django.http import FileResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from reportlab.lib.units import cm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen.canvas import Canvas
-from reportlab.pdfgen.textobject import PDFTextObject
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.request import Request
 
 from . import constants
-from .serializers import RecipeMinifiedSerializer
+from .metrics import timed
+from .pdf import render_pdf
+from .serializers import RecipeIdsSerializer, RecipeMinifiedSerializer
+from food.additions import add_recipes, remove_recipes
+from food.models import Recipe
 
 
-def start_page(file: Canvas) -> tuple[PDFTextObject, list]:
-    page = file.beginText(
-        constants.HORIZONTAL_INDENT * cm, constants.VERTICAL_INDENT * cm,
+@cache
+def get_pdf_executor() -> ProcessPoolExecutor:
+    # Под ASGI отрисовка reportlab держала бы GIL рядом с циклом событий,
+    # поэтому выполняется в отдельных процессах. Процессы запускаются
+    # через spawn, чтобы не наследовать потоки и соединения с БД воркера.
+    return ProcessPoolExecutor(
+        max_workers=constants.PDF_WORKERS, mp_context=get_context('spawn'),
     )
-    lines = []
-    return page, lines
-
-
-def finish_page(
-        page: PDFTextObject, lines: list, file: Canvas,
-) -> tuple[PDFTextObject, Canvas]:
-    page.textLines(lines)
-    file.drawText(page)
-    file.showPage()
-    return page, file
-
-
-def get_pdf_in_response(data: Dict[Any, Iterable]) -> FileResponse:
-    buffer = io.BytesIO()
-    pdfmetrics.registerFont(TTFont('DejaVuSerif', 'fonts/DejaVuSerif.ttf'))
-    file = Canvas(
-        filename=buffer,
-        initialFontName='DejaVuSerif',
-        initialFontSize=16,
-        initialLeading=1 * cm,
+
+
+def get_pdf_in_response(
+        cache_key: str, get_data: Callable[[], Dict[Any, Iterable]],
+) -> HttpResponse:
+    pdf = django_cache.get(cache_key)
+    if pdf is None:
+        data = get_data()
+        with timed('render'):
+            if settings.ASYNC_VIEWS:
+                pdf = get_pdf_executor().submit(render_pdf, data).result()
+            else:
+                # Синхронный воркер и так занят запросом.
+                pdf = render_pdf(data)
+        django_cache.set(cache_key, pdf, constants.PDF_CACHE_TIMEOUT)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{constants.SHOPPING_CART_FILENAME}.pdf"'
     )
-    page, lines = start_page(file)
-    for key, value in data.items():
-        line = f'- {key}: {" ".join(map(str, value))}'
-        for row_start in range(0, len(line), constants.MAX_COLUMN_COUNT):
-            lines.append(
-                line[row_start:row_start + constants.MAX_COLUMN_COUNT]
-            )
-            if len(lines) >= constants.MAX_ROW_COUNT:
-                page, file = finish_page(page, lines, file)
-                page, lines = start_page(file)
-    page, file = finish_page(page, lines, file)
-    file.save()
-    buffer.seek(0)
-    return FileResponse(
-        buffer, as_attachment=True, filename='shopping_cart.pdf',
+    return response
+
+
+class Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def format_csv(rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def format_txt(rows: Iterable[tuple]) -> Iterator[str]:
+    for name, measurement_unit, amount in rows:
+        yield f'- {name}: {amount} {measurement_unit}\n'
+
+
+def format_json(rows: Iterable[tuple]) -> Iterator[str]:
+    separator = ''
+    yield '['
+    for name, measurement_unit, amount in rows:
+        item = {
+            'name': name, 'measurement_unit': measurement_unit,
+            'amount': amount,
+        }
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+FORMATTERS = {'csv': format_csv, 'txt': format_txt, 'json': format_json}
+
+
+async def iterate_in_thread(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Асинхронный итератор поверх синхронного: под ASGI Django иначе
+    собирает весь ответ в память перед отправкой."""
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+
+def get_streaming_response(
+        file_format: str, rows: Iterable[tuple],
+) -> StreamingHttpResponse:
+    lines = FORMATTERS[file_format](rows)
+    chunks = iter(
+        lambda: ''.join(islice(lines, constants.STREAM_CHUNK_SIZE)), '',
+    )
+    if settings.ASYNC_VIEWS:
+        chunks = iterate_in_thread(chunks)
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=constants.SHOPPING_CART_CONTENT_TYPES[file_format],
+    )
+    response['Content-Disposition'] = (
+        'attachment; '
+        f'filename="{constants.SHOPPING_CART_FILENAME}.{file_format}"'
     )
+    return response
 
 
-def create_delete_object(
-        model_class: type, request: Request, queryset: QuerySet, pk: int,
-) -> Response:
-    recipe = get_object_or_404(queryset, pk=pk)
+def create_delete_object(model_class: type, request: Request, pk) -> Response:
+    try:
+        recipe_ids = [int(pk)]
+    except ValueError:
+        raise Http404
     if request.method == 'DELETE':
-        was_deleted, _ = model_class.objects.filter(
-            recipe=recipe, user=request.user,
-        ).delete()
-        if not was_deleted:
+        if not remove_recipes(model_class, request.user, recipe_ids):
+            get_object_or_404(Recipe, pk=pk)
             raise ValidationError('Рецепт не был добавлен.')
         return Response(status=status.HTTP_204_NO_CONTENT)
-    _, was_created = model_class.objects.get_or_create(
-        recipe=recipe, user=request.user,
-    )
-    if not was_created:
+    recipes = add_recipes(model_class, request.user, recipe_ids)
+    if not recipes:
+        get_object_or_404(Recipe, pk=pk)
         raise ValidationError('Рецепт уже добавлен.')
-    serializer = RecipeMinifiedSerializer(recipe, context={'request': request})
+    serializer = RecipeMinifiedSerializer(
+        recipes[0], context={'request': request},
+    )
+    return Response(serializer.data, status.HTTP_201_CREATED)
+
+
+@transaction.atomic
+def create_delete_objects(model_class: type, request: Request) -> Response:
+    """Добавление или удаление списка рецептов одним запросом к БД.
+
+    Уже добавленные при POST и отсутствующие при DELETE рецепты
+    пропускаются; при несуществующих id изменения откатываются.
+    """
+    serializer = RecipeIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+    if request.method == 'DELETE':
+        recipes = remove_recipes(model_class, request.user, recipe_ids)
+    else:
+        recipes = add_recipes(model_class, request.user, recipe_ids)
+    if len(recipes) < len(recipe_ids):
+        missing = set(recipe_ids).difference(
+            Recipe.objects.filter(pk__in=recipe_ids).values_list(
+                'pk', flat=True,
+            )
+        )
+        if missing:
+            raise ValidationError({
+                'recipes': 'Рецепты не найдены: '
+                + ', '.join(map(str, sorted(missing)))
+            })
+    if request.method == 'DELETE':
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    positions = {recipe_id: i for i, recipe_id in enumerate(recipe_ids)}
+    recipes.sort(key=lambda recipe: positions[recipe.pk])
+    serializer = RecipeMinifiedSerializer(
+        recipes, many=True, context={'request': request},
+    )
     return Response(serializer.data, status.HTTP_201_CREATED)
@@ -1,4 +1,7 @@
-from django.db.models import Exists, OuterRef, Sum, Value
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.db.models.functions import JSONObject
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
@@ -10,14 +13,51 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
 from . import serializers
-from .filters import IngredientFilter, RecipeFilter
+from .constants import SHOPPING_CART_CONTENT_TYPES, STREAM_CHUNK_SIZE
+from .filters import RecipeFilter
+from .ingredient_index import ingredient_index
+from .metrics import is_metrics_client, render_metrics
+from .mixins import VersionedCacheMixin
+from .negotiation import FileFormatNegotiation
+from .pagination import KeysetPagination, PageNumberOrCursorPagination
 from .permissions import IsAuthorOrReadOnly
-from .utils import create_delete_object, get_pdf_in_response
+from .utils import (
+    create_delete_object, create_delete_objects, get_pdf_in_response,
+    get_streaming_response,
+)
 from food import models
+from food.feed import get_feed_ids
+from food.versions import get_cache_key, get_version
+from users.models import Subscription
 
 
 class FoodgramUserViewSet(UserViewSet):
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('username', 'id')
+
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is None:
+            return None
+        try:
+            recipes_limit = int(recipes_limit)
+        except ValueError:
+            raise ValidationError('recipes_limit должен быть int.')
+        if recipes_limit < 0:
+            raise ValidationError('recipes_limit не может быть меньше 0.')
+        return recipes_limit
+
+    def get_subscribed_authors(self):
+        recipes = models.Recipe.objects.all()
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+        return self.queryset.annotate(
+            is_subscribed=Value(True),
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='latest_recipes'),
+        )
 
     @action(
         methods=['get'],
@@ -39,7 +79,10 @@ class FoodgramUserViewSet(UserViewSet):
     def avatar(self, request):
         user = request.user
         if request.method == 'DELETE':
-            request.user.avatar.delete()
+            # Файл может быть общим с другими загрузками, его удалит
+            # food.media, когда на него не останется ссылок.
+            user.avatar = None
+            user.save(update_fields=('avatar',))
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = serializers.UserAvatarSerializer(user, data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -65,7 +108,8 @@ class FoodgramUserViewSet(UserViewSet):
         if not was_created:
             raise ValidationError('Уже в подписках.')
         serializer = serializers.SubscriptionSerializer(
-            author, context={'request': request},
+            self.get_subscribed_authors().get(pk=author.pk),
+            context={'request': request},
         )
         return Response(serializer.data, status.HTTP_201_CREATED)
 
@@ -76,7 +120,7 @@ class FoodgramUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         subs = request.user.subscriptions.values_list('author', flat=True)
-        queryset = self.queryset.filter(pk__in=subs)
+        queryset = self.get_subscribed_authors().filter(pk__in=subs)
         page = self.paginate_queryset(queryset)
         serializer = serializers.SubscriptionSerializer(
             page, context={'request': request}, many=True,
@@ -84,48 +128,160 @@ class FoodgramUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(VersionedCacheMixin, ReadOnlyModelViewSet):
     queryset = models.Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
     pagination_class = None
     permission_classes = (permissions.AllowAny,)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
+
+    def get_version_keys(self):
+        return (('ingredients',),)
+
+    def list(self, request):
+        return self.get_cached_response(self.search, request)
+
+    def search(self, request):
+        return Response(
+            ingredient_index.search(request.query_params.get('name', '')),
+            status.HTTP_200_OK,
+        )
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(VersionedCacheMixin, ReadOnlyModelViewSet):
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
     permission_classes = (permissions.AllowAny,)
     pagination_class = None
 
+    def get_version_keys(self):
+        return (('tags',),)
+
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(VersionedCacheMixin, ModelViewSet):
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly,
     )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ('get', 'post', 'patch', 'delete')
+    pagination_class = PageNumberOrCursorPagination
+    cache_per_user = True
+
+    @property
+    def cursor_ordering(self):
+        if (
+            self.action == 'list'
+            and self.request.query_params.get('search', '').strip()
+        ):
+            return ('-search_rank', '-created_at', '-id')
+        return ('-created_at', '-id')
+
+    def get_version_keys(self):
+        keys = [('tags',), ('ingredients',), ('users',)]
+        if self.action == 'list':
+            keys.append(('recipes',))
+        user = self.request.user
+        if user.is_authenticated:
+            keys += [
+                ('favorites', user.pk),
+                ('shopping_cart', user.pk),
+                ('subscriptions', user.pk),
+            ]
+        return keys
+
+    def get_cache_versions(self):
+        versions = super().get_cache_versions()
+        if self.action != 'retrieve':
+            return versions
+        return self.add_updated_at(versions, self.get_updated_at().first())
+
+    async def aget_cache_versions(self):
+        versions = await super().aget_cache_versions()
+        if self.action != 'retrieve':
+            return versions
+        return self.add_updated_at(
+            versions, await self.get_updated_at().afirst(),
+        )
+
+    def get_updated_at(self):
+        try:
+            recipes = models.Recipe.objects.filter(pk=self.kwargs['pk'])
+        except ValueError:
+            recipes = models.Recipe.objects.none()
+        return recipes.values_list('updated_at', flat=True)
+
+    def add_updated_at(self, versions, updated_at):
+        if updated_at is None:
+            return None
+        return versions + [int(updated_at.timestamp() * 10 ** 9)]
 
     def get_queryset(self):
         user = self.request.user
+        queryset = models.Recipe.objects.defer('search_vector')
+        if self.action in ('list', 'retrieve', 'feed'):
+            # Теги и ингредиенты загружаются сериализатором только для
+            # рецептов, которых нет в кеше представлений.
+            queryset = queryset.select_related('author')
+        if self.action == 'partial_update':
+            # Сохранённые теги и ингредиенты тем же запросом: неизменные
+            # связи сериализатор не трогает.
+            queryset = queryset.annotate(
+                tag_ids=ArraySubquery(
+                    models.Recipe.tags.through.objects.filter(
+                        recipe=OuterRef('pk'),
+                    ).order_by().values('tag_id'),
+                ),
+                ingredient_amounts=ArraySubquery(
+                    models.RecipeIngredient.objects.filter(
+                        recipe=OuterRef('pk'),
+                    ).order_by().values(
+                        json=JSONObject(
+                            ingredient='ingredient_id', amount='amount',
+                        ),
+                    ),
+                ),
+            )
         if user.is_anonymous:
-            return models.Recipe.objects.annotate(
-                is_favorited=Value(False), is_in_shopping_cart=Value(False),
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False),
             ).order_by('-created_at')
         in_favorites = user.favorites.filter(recipe=OuterRef('pk'))
         in_shopping_cart = user.shoppingcart.filter(recipe=OuterRef('pk'))
-        return models.Recipe.objects.annotate(
+        author_in_subscriptions = Subscription.objects.filter(
+            follower=user, author=OuterRef('author'),
+        )
+        return queryset.annotate(
             is_favorited=Exists(in_favorites),
             is_in_shopping_cart=Exists(in_shopping_cart),
+            author_is_subscribed=Exists(author_in_subscriptions),
         ).order_by('-created_at')
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'feed'):
+            return serializers.RecipeListSerializer
+        if self.action == 'retrieve':
             return serializers.RecipeReadSerializer
         return serializers.RecipeWriteSerializer
 
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,),
+        pagination_class=KeysetPagination,
+    )
+    def feed(self, request):
+        queryset = self.get_queryset()
+        ids = get_feed_ids(
+            request.user,
+            self.paginator.decode_cursor(request, queryset),
+            self.paginator.get_page_size(request) + 1,
+        )
+        page = self.paginate_queryset(queryset.filter(pk__in=ids))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(methods=['get'], detail=True, url_path='get-link')
     def get_link(self, request, pk):
         recipe = get_object_or_404(models.Recipe, pk=pk)
@@ -135,35 +291,88 @@ class RecipeViewSet(ModelViewSet):
 
     @action(methods=['post', 'delete'], detail=True)
     def favorite(self, request, pk):
-        return create_delete_object(
-            models.Favorites, request, self.get_queryset(), pk,
-        )
+        return create_delete_object(models.Favorites, request, pk)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='favorite',
+        url_name='favorite-bulk',
+    )
+    def favorite_bulk(self, request):
+        return create_delete_objects(models.Favorites, request)
 
     @action(methods=['post', 'delete'], detail=True)
     def shopping_cart(self, request, pk):
-        return create_delete_object(
-            models.ShoppingCart, request, self.get_queryset(), pk,
+        return create_delete_object(models.ShoppingCart, request, pk)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+    )
+    def shopping_cart_bulk(self, request):
+        return create_delete_objects(models.ShoppingCart, request)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def shopping_list(self, request):
+        serializer = serializers.ShoppingListItemSerializer(
+            self.get_shopping_list(request.user), many=True,
         )
+        return Response(serializer.data)
 
     @action(
         methods=['get'],
         detail=False,
         permission_classes=(permissions.IsAuthenticated,),
+        content_negotiation_class=FileFormatNegotiation,
     )
     def download_shopping_cart(self, request):
-        ingredients = models.RecipeIngredient.objects.filter(
-            recipe__in_shoppingcart__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit',
-        ).annotate(
-            amount=Sum('amount')
-        ).order_by(
-            'ingredient__name'
+        file_format = request.query_params.get('format', 'pdf')
+        rows = self.get_shopping_list(request.user).values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'total_amount',
+        )
+        if file_format in SHOPPING_CART_CONTENT_TYPES:
+            return get_streaming_response(
+                file_format, rows.iterator(chunk_size=STREAM_CHUNK_SIZE),
+            )
+        if file_format != 'pdf':
+            raise ValidationError(
+                {'format': 'Допустимые форматы: pdf, csv, txt, json.'}
+            )
+        user_id = request.user.pk
+        cache_key = get_cache_key(
+            'shopping_cart_pdf',
+            user_id,
+            get_version('shopping_cart', user_id),
         )
-        shopping_cart = {
-            ingredient['ingredient__name']: (
-                ingredient['amount'],
-                ingredient['ingredient__measurement_unit'],
-            ) for ingredient in ingredients
-        }
-        return get_pdf_in_response(shopping_cart)
+        return get_pdf_in_response(
+            cache_key,
+            lambda: {
+                name: (amount, measurement_unit)
+                for name, measurement_unit, amount in rows
+            },
+        )
+
+    def get_shopping_list(self, user):
+        return models.ShoppingListItem.objects.filter(
+            user=user,
+        ).select_related('ingredient').order_by('ingredient__name')
+
+
+def metrics(request):
+    """Гистограммы всех воркеров в формате Prometheus.
+
+    Не проксируется nginx; отдаётся только адресам из METRICS_ALLOWED_IPS
+    или по токену METRICS_TOKEN.
+    """
+    if not is_metrics_client(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4',
+    )
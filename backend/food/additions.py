@@ -0,0 +1,76 @@
+from django.db import connection, transaction
+
+from .models import Favorites, Recipe, ShoppingCart
+from .shopping_list import add_recipes_to_list, remove_recipes_from_list
+from .versions import bump_version_on_commit
+
+# Модель добавлений: (счётчик рецепта, ключ версии пользователя)
+ADDITIONS = {
+    Favorites: ('favorites_count', 'favorites'),
+    ShoppingCart: ('in_carts_count', 'shopping_cart'),
+}
+
+RETURNED_FIELDS = ('id', 'name', 'image', 'image_variants', 'cooking_time')
+
+
+def add_recipes(model, user, recipe_ids):
+    """Добавление рецептов одним INSERT ... ON CONFLICT DO NOTHING.
+
+    Счётчик рецептов обновляется в том же запросе, список покупок — в той
+    же транзакции. Возвращает только добавленные рецепты с полями
+    RETURNED_FIELDS; несуществующие и уже добавленные id пропускаются.
+    """
+    quote = connection.ops.quote_name
+    recipe_table = quote(Recipe._meta.db_table)
+    return change_recipes(
+        model,
+        user,
+        f'INSERT INTO {quote(model._meta.db_table)} (user_id, recipe_id) '
+        f'SELECT %s, r.id FROM {recipe_table} r WHERE r.id = ANY(%s) '
+        'ON CONFLICT (user_id, recipe_id) DO NOTHING RETURNING recipe_id',
+        '{field} + 1',
+        [user.pk, list(recipe_ids)],
+        added=True,
+    )
+
+
+def remove_recipes(model, user, recipe_ids):
+    """Удаление рецептов одним DELETE ... WHERE recipe_id = ANY(...).
+
+    Возвращает удалённые рецепты.
+    """
+    return change_recipes(
+        model,
+        user,
+        f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+        'WHERE user_id = %s AND recipe_id = ANY(%s) RETURNING recipe_id',
+        'GREATEST({field} - 1, 0)',
+        [user.pk, list(recipe_ids)],
+        added=False,
+    )
+
+
+@transaction.atomic
+def change_recipes(model, user, change_sql, counter_sql, params, added):
+    # Изменения идут в обход сигналов, поэтому счётчики, версии и список
+    # покупок обновляются здесь.
+    field, version_key = ADDITIONS[model]
+    quote = connection.ops.quote_name
+    counter = counter_sql.format(field=f'r.{quote(field)}')
+    columns = ', '.join(f'r.{quote(name)}' for name in RETURNED_FIELDS)
+    # Запрос изменяет данные: только основная база, не роутер чтения.
+    recipes = list(Recipe.objects.db_manager('default').raw(
+        f'WITH changed AS ({change_sql}) '
+        f'UPDATE {quote(Recipe._meta.db_table)} r '
+        f'SET {quote(field)} = {counter} '
+        f'FROM changed WHERE r.id = changed.recipe_id RETURNING {columns}',
+        params,
+    ))
+    if recipes:
+        bump_version_on_commit(version_key, user.pk)
+        if model is ShoppingCart:
+            change_shopping_list = (
+                add_recipes_to_list if added else remove_recipes_from_list
+            )
+            change_shopping_list(user.pk, [recipe.pk for recipe in recipes])
+    return recipes
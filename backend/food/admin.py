@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count
 
 from . import models
 
@@ -22,19 +21,10 @@ class RecipeAdmin(admin.ModelAdmin):
     exclude = ('tags',)
     search_fields = ('author__username', 'name')
     list_filter = ('tags',)
-    readonly_fields = ('created_at', 'in_favorites_count', 'short_link')
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            in_favorites_count=Count('in_favorites')
-        ).order_by(
-            '-created_at'
-        )
-
-    def in_favorites_count(self, obj):
-        return obj.in_favorites_count
-
-    in_favorites_count.short_description = 'Добавлений в избранное'
+    readonly_fields = (
+        'created_at', 'updated_at', 'favorites_count', 'in_carts_count',
+        'short_link',
+    )
 
 
 @admin.register(models.Ingredient)
@@ -5,3 +5,6 @@ class FoodConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'food'
     verbose_name = 'Блюда'
+
+    def ready(self):
+        from . import signals  # noqa: F401
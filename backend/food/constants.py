@@ -18,3 +18,31 @@ VALID_SYMBOLS = DIGITS_ASCII + UPPER_CASE_ASCII + LOWER_CASE_ASCII
 
 SHORT_LINK_SIGNIFICANT_LENGTH = 8
 SHORT_LINK_MAX_LENGTH = 16
+SHORT_LINK_MODULUS = len(VALID_SYMBOLS) ** SHORT_LINK_SIGNIFICANT_LENGTH
+# Взаимно просто с SHORT_LINK_MODULUS, поэтому умножение обратимо.
+SHORT_LINK_MULTIPLIER = 137_438_953_447
+
+SHORT_LINK_CACHE_SIZE = 10_000
+SHORT_LINK_CACHE_TTL = 60 * 10
+SHORT_LINK_NEGATIVE_CACHE_TTL = 60
+
+IMAGE_VARIANT_WIDTHS = {'small': 320, 'medium': 640}
+IMAGE_VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_WORKERS = 2
+
+# Файл без ссылок удаляется не раньше, чем через это время после
+# освобождения и последней загрузки того же содержимого, секунд.
+MEDIA_ORPHAN_GRACE = 60 * 10
+MEDIA_FILE_NAME_MAX_LENGTH = 255
+
+SEARCH_CONFIG = 'russian'
+
+# Рецепты авторов с большим числом подписчиков не копируются в ленты
+# при публикации, а выбираются при чтении ленты. Копирование снова
+# включается, только когда подписчиков становится не больше
+# FEED_FANOUT_RESUME_FOLLOWERS, чтобы подписка и отписка у порога не
+# заполняли ленты каждый раз.
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+FEED_FANOUT_RESUME_FOLLOWERS = 900
+FEED_BACKFILL_SIZE = 100
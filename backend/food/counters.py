@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorites, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+# (модель, поле счётчика, считаемая модель, ссылка на модель счётчика)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorites, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscription, 'author'),
+)
+
+
+def update_counter(model, pk, field, delta):
+    """Атомарное изменение счётчика без чтения строки."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def count_related(counted_model, field):
+    return Coalesce(
+        Subquery(
+            counted_model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('pk'),
+            ).values('count')
+        ),
+        0,
+    )
+
+
+def recount():
+    """Пересчёт всех счётчиков. Возвращает число исправленных строк."""
+    fixed = {}
+    for model, field, counted_model, related_field in COUNTERS:
+        actual = count_related(counted_model, related_field)
+        fixed[f'{model._meta.model_name}.{field}'] = model.objects.exclude(
+            **{field: actual}
+        ).update(**{field: actual})
+    return fixed
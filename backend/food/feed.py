@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+
+from . import constants
+from .models import Recipe, TimelineEntry
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def fill_timelines(
+        author_id, follower_id=None, recipe_id=None,
+        limit=constants.FEED_BACKFILL_SIZE,
+):
+    """Копирование последних рецептов автора в ленты подписчиков.
+
+    Одним INSERT ... SELECT для всех подписчиков автора или одного из них;
+    при переданном recipe_id копируется только этот рецепт. Рецепты
+    авторов без feed_fanout не копируются.
+    """
+    params = []
+    recipe_condition = ''
+    if recipe_id is not None:
+        recipe_condition = 'AND r.id = %s'
+        params.append(recipe_id)
+    params += [limit, author_id]
+    conditions = ['s.author_id = %s']
+    if follower_id is not None:
+        conditions.append('s.follower_id = %s')
+        params.append(follower_id)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(TimelineEntry._meta.db_table)} '
+            '(user_id, recipe_id, created_at) '
+            'SELECT s.follower_id, r.id, r.created_at '
+            f'FROM {quote(Subscription._meta.db_table)} s '
+            f'JOIN {quote(User._meta.db_table)} a '
+            'ON a.id = s.author_id AND a.feed_fanout '
+            'CROSS JOIN LATERAL ('
+            f'SELECT r.id, r.created_at FROM {quote(Recipe._meta.db_table)} r '
+            f'WHERE r.author_id = s.author_id {recipe_condition} '
+            'ORDER BY r.created_at DESC, r.id DESC LIMIT %s'
+            ') r '
+            f'WHERE {" AND ".join(conditions)} '
+            'ON CONFLICT (user_id, recipe_id) DO NOTHING',
+            params,
+        )
+
+
+def update_feed_fanout(author_id, added):
+    """Переключение копирования рецептов автора в ленты после изменения
+    числа его подписчиков.
+
+    Копирование выключается выше FEED_FANOUT_MAX_FOLLOWERS, а включается
+    снова только при FEED_FANOUT_RESUME_FOLLOWERS и меньше; тогда в ленты
+    копируются рецепты, которые до этого выбирались при чтении.
+    """
+    if added:
+        User.objects.filter(
+            pk=author_id,
+            feed_fanout=True,
+            followers_count__gt=constants.FEED_FANOUT_MAX_FOLLOWERS,
+        ).update(feed_fanout=False)
+    elif User.objects.filter(
+        pk=author_id,
+        feed_fanout=False,
+        followers_count__lte=constants.FEED_FANOUT_RESUME_FOLLOWERS,
+    ).update(feed_fanout=True):
+        fill_timelines(author_id)
+
+
+def recount_feed_fanout():
+    """Режим лент всех авторов по счётчикам подписчиков.
+
+    Возвращает число авторов, у которых режим изменился.
+    """
+    stopped = User.objects.filter(
+        feed_fanout=True,
+        followers_count__gt=constants.FEED_FANOUT_MAX_FOLLOWERS,
+    ).update(feed_fanout=False)
+    resumed = list(
+        User.objects.filter(
+            feed_fanout=False,
+            followers_count__lte=constants.FEED_FANOUT_RESUME_FOLLOWERS,
+        ).values_list('pk', flat=True)
+    )
+    User.objects.filter(pk__in=resumed).update(feed_fanout=True)
+    for author_id in resumed:
+        fill_timelines(author_id)
+    return stopped + len(resumed)
+
+
+def clear_timeline(follower_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=follower_id, recipe__author_id=author_id,
+    ).delete()
+
+
+def get_feed_ids(user, position, limit):
+    """Id рецептов для страницы ленты после позиции (created_at, id).
+
+    Рецепты обычных авторов берутся по индексу из таблицы лент, рецепты
+    авторов с большим числом подписчиков — по индексу рецептов автора.
+    Из каждого источника читается не больше limit строк.
+    """
+    timeline = TimelineEntry.objects.filter(user=user)
+    if position is not None:
+        created_at, recipe_id = position
+        timeline = timeline.filter(
+            Q(created_at__lt=created_at)
+            | Q(created_at=created_at, recipe_id__lt=recipe_id)
+        )
+    ids = timeline.order_by('-created_at', '-recipe').values('recipe')[:limit]
+    read_authors = list(
+        user.subscriptions.filter(
+            author__feed_fanout=False,
+        ).values_list('author', flat=True)
+    )
+    if not read_authors:
+        return ids
+    recipes = Recipe.objects.filter(author__in=read_authors)
+    if position is not None:
+        recipes = recipes.filter(
+            Q(created_at__lt=created_at)
+            | Q(created_at=created_at, pk__lt=recipe_id)
+        )
+    return ids.union(
+        recipes.order_by('-created_at', '-pk').values('pk')[:limit]
+    )
@@ -0,0 +1,105 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import constants
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=constants.IMAGE_WORKERS, thread_name_prefix='images',
+)
+
+
+def get_variant_name(name, variant, image_format):
+    directory, filename = os.path.split(name)
+    stem, _ = os.path.splitext(filename)
+    return os.path.join(
+        directory, 'variants', f'{stem}_{variant}.{image_format}',
+    )
+
+
+def get_image_variants(recipe):
+    """Имена уменьшенных копий, если они готовы для текущего изображения."""
+    variants = recipe.image_variants
+    if not recipe.image or variants.get('source') != recipe.image.name:
+        return {}
+    return variants['files']
+
+
+def render_variants(image):
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    for variant, width in constants.IMAGE_VARIANT_WIDTHS.items():
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        for image_format, pil_format in (
+            constants.IMAGE_VARIANT_FORMATS.items()
+        ):
+            buffer = io.BytesIO()
+            resized.save(
+                buffer, pil_format, quality=constants.IMAGE_VARIANT_QUALITY,
+            )
+            yield variant, image_format, buffer.getvalue()
+
+
+def get_variant_files(name):
+    return {
+        variant: {
+            image_format: get_variant_name(name, variant, image_format)
+            for image_format in constants.IMAGE_VARIANT_FORMATS
+        }
+        for variant in constants.IMAGE_VARIANT_WIDTHS
+    }
+
+
+def make_variants(recipe_pk, name):
+    """Уменьшенные копии изображения рецепта.
+
+    Имена копий зависят только от имени исходного файла, которое задаётся
+    его содержимым, поэтому готовые копии не отрисовываются повторно и
+    удаляются вместе с исходным файлом.
+    """
+    from .models import Recipe
+
+    close_old_connections()
+    try:
+        files = get_variant_files(name)
+        if not all(
+            default_storage.exists(variant_name)
+            for formats in files.values() for variant_name in formats.values()
+        ):
+            with default_storage.open(name) as file, Image.open(file) as image:
+                for variant, image_format, content in render_variants(image):
+                    default_storage.save_derived(
+                        files[variant][image_format], ContentFile(content),
+                    )
+        if Recipe.objects.filter(pk=recipe_pk, image=name).update(
+            image_variants={'source': name, 'files': files},
+            updated_at=timezone.now(),
+        ):
+            bump_version('recipes')
+    except Exception:
+        logger.exception('Не удалось уменьшить изображение %s', name)
+    finally:
+        close_old_connections()
+
+
+def delete_variants(name):
+    for formats in get_variant_files(name).values():
+        for variant_name in formats.values():
+            default_storage.delete(variant_name)
+
+
+def schedule_variants(recipe):
+    if recipe.image and (
+        recipe.image_variants.get('source') != recipe.image.name
+    ):
+        executor.submit(make_variants, recipe.pk, recipe.image.name)
@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.db import connection, transaction
+
+from . import constants
+from .models import Ingredient
+
+READ_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    yield from csv.reader(file)
+
+
+def read_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(file):
+    """Построчно разбирает JSON-массив, не загружая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидается JSON-массив.')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            data = file.read(READ_SIZE)
+            if not data:
+                raise ValueError('Файл JSON обрезан или повреждён.')
+            buffer += data
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'ndjson': read_ndjson}
+
+
+def to_row(item):
+    if isinstance(item, dict):
+        name, measurement_unit = item.get('name'), item.get('measurement_unit')
+    elif isinstance(item, (list, tuple)) and len(item) == 2:
+        name, measurement_unit = item
+    else:
+        return None
+    if not isinstance(name, str) or not isinstance(measurement_unit, str):
+        return None
+    name, measurement_unit = name.strip(), measurement_unit.strip()
+    if (
+        not name
+        or not measurement_unit
+        or len(name) > constants.INGREDIENT_NAME_MAX_LENGTH
+        or len(measurement_unit) > constants.MEASUREMENT_UNIT_MAX_LENGTH
+    ):
+        return None
+    return name, measurement_unit
+
+
+class IngredientImporter:
+    """Потоковый импорт ингредиентов частями ограниченного размера.
+
+    Повторы внутри части отбрасываются множеством, повторы относительно
+    базы данных — ON CONFLICT. В PostgreSQL часть загружается через COPY
+    во временную таблицу и переносится одним INSERT ... SELECT.
+    """
+
+    staging_table = 'food_ingredient_import'
+
+    def __init__(self, chunk_size, report=None):
+        self.chunk_size = chunk_size
+        self.report = report
+        self.read = self.inserted = self.invalid = 0
+
+    def run(self, file, file_format):
+        started_at = time.monotonic()
+        items = READERS[file_format](file)
+        use_copy = connection.vendor == 'postgresql'
+        if use_copy:
+            self.create_staging_table()
+        try:
+            while True:
+                chunk = list(islice(items, self.chunk_size))
+                if not chunk:
+                    break
+                self.read += len(chunk)
+                rows = set()
+                for item in chunk:
+                    row = to_row(item)
+                    if row is None:
+                        self.invalid += 1
+                    else:
+                        rows.add(row)
+                with transaction.atomic():
+                    if use_copy:
+                        self.inserted += self.copy_rows(rows)
+                    else:
+                        self.inserted += self.bulk_create_rows(rows)
+                if self.report:
+                    self.report(self, time.monotonic() - started_at)
+        finally:
+            if use_copy:
+                self.drop_staging_table()
+        return self
+
+    def create_staging_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} '
+                f'(name varchar({constants.INGREDIENT_NAME_MAX_LENGTH}), '
+                'measurement_unit '
+                f'varchar({constants.MEASUREMENT_UNIT_MAX_LENGTH}))'
+            )
+
+    def drop_staging_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.staging_table}')
+
+    def copy_rows(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        copy_sql = (
+            f'COPY {self.staging_table} (name, measurement_unit) '
+            'FROM STDIN WITH (FORMAT csv)'
+        )
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.staging_table}')
+            if hasattr(cursor.cursor, 'copy_expert'):
+                cursor.cursor.copy_expert(copy_sql, buffer)
+            else:
+                with cursor.cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT name, measurement_unit FROM {self.staging_table} '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount
+
+    def bulk_create_rows(self, rows):
+        before = Ingredient.objects.count()
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in rows
+            ),
+            ignore_conflicts=True,
+        )
+        return Ingredient.objects.count() - before
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Func, Q
+
+from food.models import Recipe
+from food.versions import bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнение пустых коротких ссылок рецептов кодами, вычисленными '
+        'из первичного ключа. Уже выданные ссылки не меняются.'
+    )
+
+    def handle(self, *args, **options):
+        # Та же функция базы, что и в триггере вставки рецепта: коды,
+        # занятые старыми ссылками, пропускаются.
+        count = Recipe.objects.filter(
+            Q(short_link__isnull=True) | Q(short_link=''),
+        ).update(short_link=Func(F('pk'), function='food_recipe_short_link'))
+        # Коды новых ссылок могли попасть в кеши процессов как отсутствующие.
+        bump_version('short_links')
+        self.stdout.write(f'Заполнено коротких ссылок: {count}.')
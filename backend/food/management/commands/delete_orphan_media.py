@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from food import constants
+from food.media import delete_orphans
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление файлов, на которые не ссылаются рецепты и пользователи. '
+        'Воркеры удаляют их в фоне сами; команда нужна после перезапуска, '
+        'прервавшего фоновое удаление.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=constants.MEDIA_ORPHAN_GRACE,
+            help='Сколько секунд файл должен оставаться без ссылок.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = delete_orphans(options['grace'])
+        self.stdout.write(f'Удалено файлов: {deleted}.')
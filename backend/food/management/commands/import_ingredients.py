@@ -1,36 +1,63 @@
-import csv
 import os
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from food.models import Ingredient
+from food.importers import READERS, IngredientImporter
+from food.versions import bump_version
+
+CHUNK_SIZE = 50_000
 
 
 class Command(BaseCommand):
-    help = 'Импорт ингредиентов в базу данных.'
+    help = 'Импорт ингредиентов в базу данных из файла CSV, JSON или NDJSON.'
 
-    def handle(self, *args, **options):
-        self.load_ingredients(
-            os.path.join(settings.BASE_DIR, 'ingredients.csv'),
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'ingredients.csv'),
+            help='Путь к файлу, по умолчанию ingredients.csv.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='Формат файла, по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество строк, загружаемых за один раз.',
         )
 
-    def load_ingredients(self, filepath):
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            ingredients = []
-            names = []
-            for name, measurement_unit in reader:
-                ingredients.append(
-                    Ingredient(name=name, measurement_unit=measurement_unit),
-                )
-                names.append(name)
-            ingredients_in_db = Ingredient.objects.filter(
-                name__in=names).values_list('name', flat=True)
-            ingredients_to_insert = [
-                ingredient for ingredient in ingredients
-                if ingredient.name not in ingredients_in_db
-            ]
-            Ingredient.objects.bulk_create(
-                ingredients_to_insert, ignore_conflicts=True,
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (
+            options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        )
+        if file_format not in READERS:
+            raise CommandError(
+                'Укажите формат файла: ' + ', '.join(READERS) + '.'
             )
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                importer = IngredientImporter(
+                    options['chunk_size'], self.report,
+                ).run(file, file_format)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        finally:
+            bump_version('ingredients')
+        self.stdout.write(
+            f'Прочитано строк: {importer.read}, '
+            f'добавлено ингредиентов: {importer.inserted}, '
+            f'пропущено некорректных строк: {importer.invalid}.'
+        )
+
+    def report(self, importer, elapsed):
+        speed = importer.read / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Обработано строк: {importer.read}, '
+            f'добавлено: {importer.inserted}, {speed:.0f} строк/с.'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from food.images import get_image_variants, make_variants
+from food.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий изображений существующих рецептов.'
+
+    def handle(self, *args, **options):
+        count = 0
+        for recipe in Recipe.objects.exclude(image='').only(
+            'pk', 'image', 'image_variants',
+        ).iterator():
+            if not get_image_variants(recipe):
+                make_variants(recipe.pk, recipe.image.name)
+                count += 1
+        self.stdout.write(f'Обработано изображений: {count}.')
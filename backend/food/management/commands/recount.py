@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from food.counters import recount
+from food.feed import recount_feed_fanout
+from food.shopping_list import rebuild_lists
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт хранимых счётчиков: избранного и корзин у рецептов, '
+        'рецептов и подписчиков у пользователей, режима лент авторов и '
+        'пересборка списков покупок.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = recount()
+            fanout_changed = recount_feed_fanout()
+            shopping_list_rows = rebuild_lists()
+        for counter, count in fixed.items():
+            self.stdout.write(f'{counter}: исправлено строк: {count}.')
+        self.stdout.write(
+            f'Режим лент изменён у авторов: {fanout_changed}.'
+        )
+        self.stdout.write(
+            f'Списки покупок пересобраны, строк: {shopping_list_rows}.'
+        )
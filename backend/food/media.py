@@ -0,0 +1,133 @@
+import logging
+from datetime import timedelta
+from threading import Lock, Timer
+
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from . import constants
+from .images import delete_variants
+from .models import MediaFile
+
+logger = logging.getLogger(__name__)
+
+deletion_lock = Lock()
+deletion_timer = None
+
+
+def get_file_name(value):
+    return value if isinstance(value, str) else getattr(value, 'name', None)
+
+
+def file_saved(instance, field, created):
+    if field not in instance.__dict__:
+        return
+    stored = getattr(instance, '_stored_files', {})
+    if field not in stored and not created:
+        return
+    old_name = stored.get(field)
+    new_name = get_file_name(instance.__dict__[field])
+    if old_name != new_name:
+        change_references({new_name: 1, old_name: -1})
+        # Новый словарь: копии объекта не должны делить запомненные имена.
+        instance._stored_files = {**stored, field: new_name}
+
+
+def file_deleted(instance, field):
+    if field in instance.__dict__:
+        change_references({get_file_name(instance.__dict__[field]): -1})
+
+
+def hold_file(name):
+    """Откладывает удаление файла без ссылок перед повторной загрузкой.
+
+    UPDATE блокирует строку файла: начатое удаление завершается до
+    проверки файла в хранилище, а новое не начнётся ещё
+    MEDIA_ORPHAN_GRACE секунд, за которые загрузка получит ссылку.
+    """
+    MediaFile.objects.filter(name=name, reference_count=0).update(
+        released_at=timezone.now(),
+    )
+
+
+def change_references(changes):
+    """Изменение числа ссылок на файлы одним запросом.
+
+    changes — изменения по именам файлов; файлы, оставшиеся без ссылок,
+    удаляются в фоне после фиксации транзакции.
+    """
+    changes = {name: delta for name, delta in changes.items() if name}
+    if not changes:
+        return
+    table = connection.ops.quote_name(MediaFile._meta.db_table)
+    new_count = (
+        'm.reference_count + (SELECT c.delta FROM c WHERE c.name = m.name)'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'WITH c (name, delta) AS ('
+            'SELECT * FROM unnest(%s::text[], %s::integer[])) '
+            f'INSERT INTO {table} AS m (name, reference_count, released_at) '
+            'SELECT name, GREATEST(delta, 0), '
+            'CASE WHEN delta > 0 THEN NULL ELSE now() END FROM c '
+            'ON CONFLICT (name) DO UPDATE SET '
+            f'reference_count = GREATEST({new_count}, 0), released_at = '
+            f'CASE WHEN {new_count} > 0 THEN NULL ELSE now() END',
+            [list(changes), list(changes.values())],
+        )
+    if min(changes.values()) < 0:
+        transaction.on_commit(schedule_orphan_deletion)
+
+
+def schedule_orphan_deletion():
+    """Запуск delete_orphans в фоне, когда истечёт MEDIA_ORPHAN_GRACE.
+
+    В процессе ждёт не больше одного запуска.
+    """
+    global deletion_timer
+    with deletion_lock:
+        if deletion_timer is not None:
+            return
+        deletion_timer = Timer(
+            constants.MEDIA_ORPHAN_GRACE + 1, run_orphan_deletion,
+        )
+        deletion_timer.daemon = True
+        deletion_timer.start()
+
+
+def run_orphan_deletion():
+    global deletion_timer
+    with deletion_lock:
+        deletion_timer = None
+    close_old_connections()
+    try:
+        delete_orphans()
+        if MediaFile.objects.filter(reference_count=0).exists():
+            schedule_orphan_deletion()
+    except Exception:
+        logger.exception('Не удалось удалить файлы без ссылок')
+    finally:
+        close_old_connections()
+
+
+def delete_orphans(grace=constants.MEDIA_ORPHAN_GRACE):
+    """Удаление файлов без ссылок и их уменьшенных копий.
+
+    Файл удаляется, если ссылок нет дольше grace секунд и столько же
+    его содержимое не загружалось снова (hold_file). Строки блокируются
+    до конца транзакции с SKIP LOCKED, поэтому удалять файлы могут
+    несколько процессов одновременно, а загрузка того же содержимого
+    ждёт удаления. Возвращает число удалённых файлов.
+    """
+    deadline = timezone.now() - timedelta(seconds=grace)
+    deleted = []
+    with transaction.atomic():
+        for media_file in MediaFile.objects.select_for_update(
+            skip_locked=True,
+        ).filter(reference_count=0, released_at__lt=deadline):
+            default_storage.delete(media_file.name)
+            delete_variants(media_file.name)
+            deleted.append(media_file.pk)
+        MediaFile.objects.filter(pk__in=deleted, reference_count=0).delete()
+    return len(deleted)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0009_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_link',
+            field=models.CharField(blank=True, max_length=16, null=True, unique=True, verbose_name='Короткая ссылка'),
+        ),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# Поисковый вектор: название (вес A), ингредиенты (B) и описание (C).
+# Пересчитывается триггерами при изменении рецепта, его ингредиентов
+# и названий ингредиентов, поэтому bulk-операции ORM тоже учитываются.
+CREATE_SEARCH_SQL = """
+CREATE FUNCTION food_recipe_search_vector(
+    p_recipe_id bigint, p_name text, p_text text
+) RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce(p_name, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(i.name, ' ')
+            FROM food_recipeingredient ri
+            JOIN food_ingredient i ON i.id = ri.ingredient_id
+            WHERE ri.recipe_id = p_recipe_id
+        ), '')), 'B')
+        || setweight(to_tsvector('russian', coalesce(p_text, '')), 'C')
+$$;
+
+CREATE FUNCTION food_recipe_refresh_search_vector(p_ids bigint[])
+RETURNS void LANGUAGE sql AS $$
+    UPDATE food_recipe
+    SET search_vector = food_recipe_search_vector(id, name, text)
+    WHERE id = ANY(p_ids)
+$$;
+
+CREATE FUNCTION food_recipe_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := food_recipe_search_vector(NEW.id, NEW.name, NEW.text);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER food_recipe_search_vector
+BEFORE INSERT OR UPDATE OF name, text ON food_recipe
+FOR EACH ROW EXECUTE FUNCTION food_recipe_search_vector_trigger();
+
+CREATE FUNCTION food_recipeingredient_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM food_recipe_refresh_search_vector(
+            ARRAY(SELECT DISTINCT recipe_id FROM new_rows)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM food_recipe_refresh_search_vector(
+            ARRAY(SELECT DISTINCT recipe_id FROM old_rows)
+        );
+    ELSE
+        PERFORM food_recipe_refresh_search_vector(ARRAY(
+            SELECT recipe_id FROM new_rows
+            UNION SELECT recipe_id FROM old_rows
+        ));
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER food_recipeingredient_search_vector_insert
+AFTER INSERT ON food_recipeingredient
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION food_recipeingredient_search_vector_trigger();
+
+CREATE TRIGGER food_recipeingredient_search_vector_update
+AFTER UPDATE ON food_recipeingredient
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION food_recipeingredient_search_vector_trigger();
+
+CREATE TRIGGER food_recipeingredient_search_vector_delete
+AFTER DELETE ON food_recipeingredient
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION food_recipeingredient_search_vector_trigger();
+
+CREATE FUNCTION food_ingredient_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM food_recipe_refresh_search_vector(ARRAY(
+        SELECT DISTINCT ri.recipe_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN food_recipeingredient ri ON ri.ingredient_id = n.id
+        WHERE o.name IS DISTINCT FROM n.name
+    ));
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER food_ingredient_search_vector
+AFTER UPDATE ON food_ingredient
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION food_ingredient_search_vector_trigger();
+
+UPDATE food_recipe
+SET search_vector = food_recipe_search_vector(id, name, text);
+"""
+
+DROP_SEARCH_SQL = """
+DROP TRIGGER food_ingredient_search_vector ON food_ingredient;
+DROP FUNCTION food_ingredient_search_vector_trigger();
+DROP TRIGGER food_recipeingredient_search_vector_delete
+ON food_recipeingredient;
+DROP TRIGGER food_recipeingredient_search_vector_update
+ON food_recipeingredient;
+DROP TRIGGER food_recipeingredient_search_vector_insert
+ON food_recipeingredient;
+DROP FUNCTION food_recipeingredient_search_vector_trigger();
+DROP TRIGGER food_recipe_search_vector ON food_recipe;
+DROP FUNCTION food_recipe_search_vector_trigger();
+DROP FUNCTION food_recipe_refresh_search_vector(bigint[]);
+DROP FUNCTION food_recipe_search_vector(bigint, text, text);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0012_recipe_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый индекс'),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_SQL, DROP_SEARCH_SQL),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Ленты существующих подписчиков: последние 100 рецептов каждого автора,
+# у которого не больше 1000 подписчиков.
+FILL_TIMELINES_SQL = """
+INSERT INTO food_timelineentry (user_id, recipe_id, created_at)
+SELECT s.follower_id, r.id, r.created_at
+FROM users_subscription s
+JOIN users_user a ON a.id = s.author_id AND a.followers_count <= 1000
+CROSS JOIN LATERAL (
+    SELECT r.id, r.created_at FROM food_recipe r
+    WHERE r.author_id = s.author_id
+    ORDER BY r.created_at DESC, r.id DESC LIMIT 100
+) r
+ON CONFLICT (user_id, recipe_id) DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0013_recipe_search_vector'),
+        ('users', '0004_user_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='Рецепт добавлен')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='in_timelines', to='food.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рецепт в ленте',
+                'verbose_name_plural': 'Рецепты в лентах',
+                'indexes': [models.Index(fields=['user', '-created_at', '-recipe'], name='timeline_user_created_at_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline_entry')],
+            },
+        ),
+        migrations.RunSQL(FILL_TIMELINES_SQL, migrations.RunSQL.noop),
+    ]
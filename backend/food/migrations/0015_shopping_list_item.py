@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Списки покупок по существующим корзинам.
+FILL_SHOPPING_LISTS_SQL = """
+INSERT INTO food_shoppinglistitem (user_id, ingredient_id, total_amount)
+SELECT c.user_id, ri.ingredient_id, SUM(ri.amount)
+FROM food_shoppingcart c
+JOIN food_recipeingredient ri ON ri.recipe_id = c.recipe_id
+WHERE ri.ingredient_id IS NOT NULL
+GROUP BY c.user_id, ri.ingredient_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0014_timeline_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='in_shopping_lists', to='food.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент в списке покупок',
+                'verbose_name_plural': 'Ингредиенты в списках покупок',
+                'constraints': [models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item')],
+            },
+        ),
+        migrations.RunSQL(FILL_SHOPPING_LISTS_SQL, migrations.RunSQL.noop),
+    ]
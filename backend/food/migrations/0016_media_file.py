@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:44
+
+from django.db import migrations, models
+
+# Ссылки на уже загруженные изображения рецептов и аватары.
+FILL_MEDIA_FILES_SQL = """
+INSERT INTO food_mediafile (name, reference_count)
+SELECT name, COUNT(*)
+FROM (
+    SELECT image AS name FROM food_recipe
+    UNION ALL
+    SELECT avatar FROM users_user
+) files
+WHERE name <> ''
+GROUP BY name;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0015_shopping_list_item'),
+        ('users', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('reference_count', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Ссылок нет с')),
+            ],
+            options={
+                'verbose_name': 'Файл',
+                'verbose_name_plural': 'Файлы',
+                'indexes': [models.Index(condition=models.Q(('reference_count', 0)), fields=['released_at'], name='media_file_orphan_idx')],
+            },
+        ),
+        migrations.RunSQL(FILL_MEDIA_FILES_SQL, migrations.RunSQL.noop),
+    ]
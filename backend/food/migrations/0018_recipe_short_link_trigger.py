@@ -0,0 +1,71 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+
+# Код короткой ссылки вычисляется при вставке рецепта так же, как
+# food.short_links.encode_short_link. Если код занят старой случайной
+# ссылкой, берутся следующие значения последовательности первичных ключей:
+# они уже не станут ключами, поэтому их коды не совпадут с кодами
+# будущих рецептов.
+CREATE_SHORT_LINK_SQL = """
+CREATE FUNCTION food_recipe_short_link(p_recipe_id bigint)
+RETURNS varchar LANGUAGE plpgsql AS $$
+DECLARE
+    alphabet constant text :=
+        '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz';
+    source numeric := p_recipe_id;
+    number numeric;
+    code varchar;
+BEGIN
+    LOOP
+        number := source * 137438953447 % 218340105584896;
+        code := '';
+        FOR i IN 1..8 LOOP
+            code := substr(alphabet, (number % 62)::integer + 1, 1) || code;
+            number := div(number, 62);
+        END LOOP;
+        EXIT WHEN NOT EXISTS (
+            SELECT 1 FROM food_recipe WHERE short_link = code
+        );
+        source := nextval(pg_get_serial_sequence('food_recipe', 'id'));
+    END LOOP;
+    RETURN code;
+END
+$$;
+
+CREATE FUNCTION food_recipe_short_link_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.short_link := food_recipe_short_link(NEW.id);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER food_recipe_short_link
+BEFORE INSERT ON food_recipe
+FOR EACH ROW WHEN (NEW.short_link IS NULL OR NEW.short_link = '')
+EXECUTE FUNCTION food_recipe_short_link_trigger();
+"""
+
+DROP_SHORT_LINK_SQL = """
+DROP TRIGGER food_recipe_short_link ON food_recipe;
+DROP FUNCTION food_recipe_short_link_trigger();
+DROP FUNCTION food_recipe_short_link(bigint);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0017_ingredient_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_link',
+            field=models.CharField(blank=True, db_default=None, max_length=16, null=True, unique=True, verbose_name='Короткая ссылка'),
+        ),
+        migrations.RunSQL(CREATE_SHORT_LINK_SQL, DROP_SHORT_LINK_SQL),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# Индекс для поиска в середине названия в большом каталоге ингредиентов
+# (api.ingredient_index). Создаётся, только если сервер PostgreSQL
+# поставляется с расширением pg_trgm; без него такой поиск читает
+# индекс ingredient_name_prefix_idx целиком.
+def create_trigram_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX ingredient_name_trigram_idx ON food_ingredient '
+        'USING gin (lower(name) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS ingredient_name_trigram_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0018_recipe_short_link_trigger'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,39 @@
+class StoredCountersMixin:
+    """Модель со счётчиками и флагами, которые меняются только
+    атомарными UPDATE (food.counters, food.feed).
+
+    Обычное сохранение существующей строки не записывает поля
+    counter_fields: копия в памяти может устареть.
+    """
+
+    counter_fields = ()
+
+    def save(self, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.counter_fields
+            ]
+        super().save(**kwargs)
+
+
+class StoredFilesMixin:
+    """Модель, запоминающая имена файлов file_fields при загрузке из базы.
+
+    По ним food.media меняет число ссылок на файлы после сохранения.
+    Новые объекты и отложенные поля не запоминаются.
+    """
+
+    file_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_files = {
+            field: instance.__dict__[field]
+            for field in cls.file_fields if field in instance.__dict__
+        }
+        return instance
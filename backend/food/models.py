@@ -1,10 +1,12 @@
-from random import choice
-
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Collate, Lower
 
 from . import constants
+from .mixins import StoredCountersMixin, StoredFilesMixin
 
 User = get_user_model()
 
@@ -27,6 +29,12 @@ class Ingredient(models.Model):
                 violation_error_message='Ингредиент уже добавлен.',
             )
         ]
+        indexes = [
+            # Поиск по началу названия в порядке кодов символов.
+            models.Index(
+                Collate(Lower('name'), 'C'), name='ingredient_name_prefix_idx',
+            ),
+        ]
         ordering = ('name', 'measurement_unit')
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
@@ -59,7 +67,7 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(StoredCountersMixin, StoredFilesMixin, models.Model):
     tags = models.ManyToManyField(Tag, verbose_name='Теги')
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, verbose_name='Автор',
@@ -71,6 +79,12 @@ class Recipe(models.Model):
         max_length=constants.RECIPE_NAME_MAX_LENGTH, verbose_name='Название',
     )
     image = models.ImageField(upload_to='recipes', verbose_name='Изображение')
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные изображения',
+    )
     text = models.TextField(verbose_name='Описание')
     cooking_time = models.PositiveSmallIntegerField(
         validators=[
@@ -79,42 +93,53 @@ class Recipe(models.Model):
         ],
         verbose_name='Время приготовления, мин',
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Добавлений в избранное',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Добавлений в корзину',
+    )
+    # Пустой код заполняет триггер базы (миграция 0018) в той же вставке,
+    # db_default возвращает его в модель через RETURNING.
     short_link = models.CharField(
         unique=True,
+        null=True,
         blank=True,
+        db_default=None,
         max_length=constants.SHORT_LINK_MAX_LENGTH,
         verbose_name='Короткая ссылка',
     )
+    search_vector = SearchVectorField(
+        null=True, editable=False, verbose_name='Поисковый индекс',
+    )
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name='Добавлен',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Изменён',
+    )
+
+    counter_fields = ('favorites_count', 'in_carts_count')
+    file_fields = ('image',)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'], name='recipe_created_at_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-created_at'],
+                name='recipe_author_created_at_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'], name='recipe_search_vector_idx',
+            ),
+        ]
         ordering = ('-created_at',)
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
-    def get_short_link(self):
-        return (
-            ''.join(
-                [
-                    chr(choice(constants.VALID_SYMBOLS))
-                    for _ in range(constants.SHORT_LINK_SIGNIFICANT_LENGTH)
-                ]
-            )
-        )
-
-    def save(self, **kwargs):
-        if not self.short_link:
-            while True:
-                self.short_link = self.get_short_link()
-                if not (
-                    Recipe.objects.filter(short_link=self.short_link).exists()
-                ):
-                    break
-        return super().save(**kwargs)
-
     def __str__(self):
         return (
             f'{self.name[:constants.STR_MAX_LENGTH_SHORT]}, '
@@ -205,3 +230,100 @@ class ShoppingCart(FavoritesShoppingCart):
             'в списке покупок у '
             f'{self.user.username[:constants.STR_MAX_LENGTH_SHORT]}.'
         )
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по рецептам в корзине пользователя.
+
+    Обновляется в транзакциях изменения корзины и ингредиентов рецептов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='in_shopping_lists',
+        verbose_name='Ингредиент',
+    )
+    total_amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item',
+            )
+        ]
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+
+
+class TimelineEntry(models.Model):
+    """Рецепт в ленте подписок пользователя, добавленный при публикации."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='in_timelines',
+        verbose_name='Рецепт',
+    )
+    created_at = models.DateTimeField(verbose_name='Рецепт добавлен')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_timeline_entry',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at', '-recipe'],
+                name='timeline_user_created_at_idx',
+            ),
+        ]
+        verbose_name = 'Рецепт в ленте'
+        verbose_name_plural = 'Рецепты в лентах'
+
+
+class MediaFile(models.Model):
+    """Число ссылок на файл хранилища.
+
+    Файлы без ссылок удаляются в фоне, см. food.media.
+    """
+
+    name = models.CharField(
+        max_length=constants.MEDIA_FILE_NAME_MAX_LENGTH,
+        unique=True,
+        verbose_name='Файл',
+    )
+    reference_count = models.PositiveIntegerField(
+        default=0, verbose_name='Ссылок',
+    )
+    released_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Ссылок нет с',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['released_at'],
+                condition=models.Q(reference_count=0),
+                name='media_file_orphan_idx',
+            ),
+        ]
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,109 @@
+from django.db import connection
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def get_table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def add_recipes_to_list(user_id, recipe_ids):
+    """Добавление ингредиентов рецептов в список покупок пользователя."""
+    change_lists(get_recipes_sql(), [user_id, list(recipe_ids)], add=True)
+
+
+def remove_recipes_from_list(user_id, recipe_ids):
+    change_lists(get_recipes_sql(), [user_id, list(recipe_ids)], add=False)
+
+
+def add_ingredients_to_lists(recipe_id, ingredients):
+    """Добавление ингредиентов рецепта в списки всех, у кого он в корзине.
+
+    ingredients — пары (id ингредиента, количество).
+    """
+    if not ingredients:
+        return
+    change_lists(
+        get_ingredients_sql(), get_ingredients_params(recipe_id, ingredients),
+        add=True,
+    )
+
+
+def remove_ingredients_from_lists(recipe_id, ingredients):
+    if not ingredients:
+        return
+    change_lists(
+        get_ingredients_sql(), get_ingredients_params(recipe_id, ingredients),
+        add=False,
+    )
+
+
+def get_recipes_sql():
+    return (
+        'SELECT %s AS user_id, ingredient_id, amount '
+        f'FROM {get_table(RecipeIngredient)} '
+        'WHERE recipe_id = ANY(%s) AND ingredient_id IS NOT NULL'
+    )
+
+
+def get_ingredients_sql():
+    return (
+        'SELECT c.user_id, i.ingredient_id, i.amount '
+        f'FROM {get_table(ShoppingCart)} c '
+        'CROSS JOIN unnest(%s::bigint[], %s::integer[]) '
+        'AS i (ingredient_id, amount) '
+        'WHERE c.recipe_id = %s AND i.ingredient_id IS NOT NULL'
+    )
+
+
+def get_ingredients_params(recipe_id, ingredients):
+    ingredient_ids, amounts = zip(*ingredients)
+    return [list(ingredient_ids), list(amounts), recipe_id]
+
+
+def change_lists(source_sql, params, add):
+    # Строки источника суммируются по (пользователь, ингредиент) и
+    # прибавляются к списку или вычитаются из него; строки, дошедшие
+    # до нуля, удаляются тем же запросом.
+    table = get_table(ShoppingListItem)
+    totals = (
+        'SELECT user_id, ingredient_id, SUM(amount) AS amount '
+        f'FROM ({source_sql}) s GROUP BY user_id, ingredient_id'
+    )
+    matches = 'l.user_id = s.user_id AND l.ingredient_id = s.ingredient_id'
+    if add:
+        sql = (
+            f'INSERT INTO {table} AS l (user_id, ingredient_id, total_amount) '
+            f'{totals} ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+            'SET total_amount = l.total_amount + EXCLUDED.total_amount'
+        )
+    else:
+        sql = (
+            f'WITH s AS ({totals}), deleted AS ('
+            f'DELETE FROM {table} l USING s '
+            f'WHERE {matches} AND l.total_amount <= s.amount) '
+            f'UPDATE {table} l SET total_amount = l.total_amount - s.amount '
+            f'FROM s WHERE {matches} AND l.total_amount > s.amount'
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_lists():
+    """Пересборка всех списков покупок по корзинам.
+
+    Возвращает число строк в списках.
+    """
+    table = get_table(ShoppingListItem)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, ingredient_id, total_amount) '
+            'SELECT c.user_id, ri.ingredient_id, SUM(ri.amount) '
+            f'FROM {get_table(ShoppingCart)} c '
+            f'JOIN {get_table(RecipeIngredient)} ri '
+            'ON ri.recipe_id = c.recipe_id '
+            'WHERE ri.ingredient_id IS NOT NULL '
+            'GROUP BY c.user_id, ri.ingredient_id'
+        )
+        return cursor.rowcount
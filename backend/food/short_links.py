@@ -0,0 +1,86 @@
+from . import constants
+from .lru import LRUCache
+from .versions import aget_versions, get_version
+
+ALPHABET = ''.join(map(chr, constants.VALID_SYMBOLS))
+BASE = len(ALPHABET)
+INVERSE_MULTIPLIER = pow(
+    constants.SHORT_LINK_MULTIPLIER, -1, constants.SHORT_LINK_MODULUS,
+)
+
+short_link_cache = LRUCache(
+    constants.SHORT_LINK_CACHE_SIZE, constants.SHORT_LINK_CACHE_TTL,
+)
+MISSING = object()
+
+
+def encode_short_link(pk):
+    """Код короткой ссылки из первичного ключа в перемешанной записи base62.
+
+    Умножение на число, взаимно простое с модулем, задаёт биекцию, поэтому
+    коды разных рецептов не совпадают. При вставке рецепта код вычисляет
+    триггер базы (миграция food 0018), пропуская коды старых ссылок.
+    """
+    number = (
+        pk * constants.SHORT_LINK_MULTIPLIER % constants.SHORT_LINK_MODULUS
+    )
+    symbols = []
+    for _ in range(constants.SHORT_LINK_SIGNIFICANT_LENGTH):
+        number, remainder = divmod(number, BASE)
+        symbols.append(ALPHABET[remainder])
+    return ''.join(reversed(symbols))
+
+
+def is_valid_short_link(short_link):
+    return len(short_link) == constants.SHORT_LINK_SIGNIFICANT_LENGTH and all(
+        symbol in ALPHABET for symbol in short_link
+    )
+
+
+def resolve_short_link(short_link):
+    """pk рецепта по коду короткой ссылки или None.
+
+    Результаты, в том числе отсутствие рецепта, кешируются в процессе
+    до смены общей версии 'short_links' при удалении рецептов.
+    """
+    from .models import Recipe
+
+    if not is_valid_short_link(short_link):
+        return None
+    version = get_version('short_links')
+    pk = get_cached_short_link(short_link, version)
+    if pk is MISSING:
+        pk = Recipe.objects.filter(
+            short_link=short_link,
+        ).values_list('pk', flat=True).first()
+        cache_short_link(short_link, pk, version)
+    return pk
+
+
+async def aresolve_short_link(short_link):
+    """Асинхронный вариант resolve_short_link."""
+    from .models import Recipe
+
+    if not is_valid_short_link(short_link):
+        return None
+    version, = await aget_versions(('short_links',))
+    pk = get_cached_short_link(short_link, version)
+    if pk is MISSING:
+        pk = await Recipe.objects.filter(
+            short_link=short_link,
+        ).values_list('pk', flat=True).afirst()
+        cache_short_link(short_link, pk, version)
+    return pk
+
+
+def get_cached_short_link(short_link, version):
+    cached_version, pk = short_link_cache.get(short_link, (None, MISSING))
+    return pk if cached_version == version else MISSING
+
+
+def cache_short_link(short_link, pk, version):
+    short_link_cache.set(
+        short_link,
+        (version, pk),
+        None if pk else constants.SHORT_LINK_NEGATIVE_CACHE_TTL,
+    )
@@ -0,0 +1,161 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from .counters import update_counter
+from .feed import clear_timeline, fill_timelines
+from .images import schedule_variants
+from .media import file_deleted, file_saved
+from .models import (
+    Favorites, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag,
+)
+from .shopping_list import (
+    add_ingredients_to_lists, add_recipes_to_list,
+    remove_ingredients_from_lists, remove_recipes_from_list,
+)
+from .versions import bump_version_on_commit
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def bump_shopping_cart_versions(user_ids):
+    for user_id in set(user_ids):
+        bump_version_on_commit('shopping_cart', user_id)
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(instance, **kwargs):
+    bump_shopping_cart_versions((instance.user_id,))
+
+
+@receiver((post_save, post_delete), sender=Favorites)
+def favorites_changed(instance, **kwargs):
+    bump_version_on_commit('favorites', instance.user_id)
+
+
+@receiver(post_save, sender=Favorites)
+def favorite_added(instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorites)
+def favorite_removed(instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, instance.recipe_id, 'in_carts_count', 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_removed(instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, 'in_carts_count', -1)
+
+
+# Ингредиент рецепта в корзине вычитается из списка покупок один раз:
+# при удалении рецепта каскадом удаляются и строки корзины, и ингредиенты
+# рецепта, и вычитание выполняет то удаление, что случилось первым.
+@receiver(post_save, sender=ShoppingCart)
+def shopping_list_recipe_added(instance, created, **kwargs):
+    if created:
+        add_recipes_to_list(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_list_recipe_removed(instance, **kwargs):
+    remove_recipes_from_list(instance.user_id, [instance.recipe_id])
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def shopping_list_ingredient_changing(instance, **kwargs):
+    if instance.pk is None:
+        return
+    old = RecipeIngredient.objects.filter(pk=instance.pk).values_list(
+        'ingredient', 'amount',
+    ).first()
+    if old is not None:
+        remove_ingredients_from_lists(instance.recipe_id, [old])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def shopping_list_ingredient_saved(instance, **kwargs):
+    add_ingredients_to_lists(
+        instance.recipe_id, [(instance.ingredient_id, instance.amount)],
+    )
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def shopping_list_ingredient_removed(instance, **kwargs):
+    remove_ingredients_from_lists(
+        instance.recipe_id, [(instance.ingredient_id, instance.amount)],
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(instance, created, **kwargs):
+    bump_version_on_commit('recipes')
+    transaction.on_commit(partial(schedule_variants, instance))
+    if created:
+        update_counter(User, instance.author_id, 'recipes_count', 1)
+        fill_timelines(instance.author_id, recipe_id=instance.pk, limit=1)
+    else:
+        bump_shopping_cart_versions(
+            instance.in_shoppingcart.values_list('user', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    bump_version_on_commit('recipes')
+    update_counter(User, instance.author_id, 'recipes_count', -1)
+    # Кеши коротких ссылок в других процессах сверяются с этой версией.
+    bump_version_on_commit('short_links')
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(instance, created, **kwargs):
+    file_saved(instance, 'image', created)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_image_deleted(instance, **kwargs):
+    file_deleted(instance, 'image')
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_added_to_feed(instance, created, **kwargs):
+    if created:
+        fill_timelines(instance.author_id, follower_id=instance.follower_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_removed_from_feed(instance, **kwargs):
+    clear_timeline(instance.follower_id, instance.author_id)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    bump_version_on_commit('tags')
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_catalog_changed(**kwargs):
+    bump_version_on_commit('ingredients')
+
+
+@receiver((post_save, pre_delete), sender=Ingredient)
+def ingredient_changed(instance, **kwargs):
+    bump_shopping_cart_versions(
+        ShoppingCart.objects.filter(
+            recipe__ingredients_for__ingredient=instance,
+        ).values_list('user', flat=True)
+    )
@@ -0,0 +1,49 @@
+import os
+import posixpath
+from hashlib import sha256
+from uuid import uuid4
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 содержимого.
+
+    Одинаковые загрузки сохраняются в один файл, а содержимое по адресу
+    файла никогда не меняется. Удалением файлов без ссылок занимается
+    food.media.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save.
+        return name
+
+    def get_content_name(self, name, content):
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name), hexdigest[:2],
+            hexdigest + posixpath.splitext(name)[1].lower(),
+        )
+
+    def _save(self, name, content):
+        from .media import hold_file
+
+        name = self.get_content_name(name, content)
+        # Файл без ссылок не удаляется, пока загрузка не сохранит ссылку.
+        hold_file(name)
+        if self.exists(name):
+            return name
+        return self.save_derived(name, content)
+
+    def save_derived(self, name, content):
+        """Сохранение под заданным именем, уже зависящим от содержимого.
+
+        Файл пишется во временный и переименовывается, поэтому параллельные
+        записи одного файла не видны читателям недописанными.
+        """
+        temporary_name = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
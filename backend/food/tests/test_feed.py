@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from food.models import Recipe
+from users.models import Subscription, User
+
+
+def create_user(number):
+    return User.objects.create_user(
+        email=f'user{number}@example.com',
+        username=f'user{number}',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password-123',
+    )
+
+
+@mock.patch('food.constants.FEED_FANOUT_MAX_FOLLOWERS', 2)
+@mock.patch('food.constants.FEED_FANOUT_RESUME_FOLLOWERS', 1)
+class FeedFanoutTest(TestCase):
+
+    def setUp(self):
+        self.author = create_user(0)
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            name='Рецепт',
+            image='recipes/recipe.png',
+            text='Описание',
+            cooking_time=10,
+        )
+        self.followers = [create_user(number) for number in range(1, 4)]
+
+    def subscribe(self, follower):
+        Subscription.objects.create(author=self.author, follower=follower)
+
+    def unsubscribe(self, follower):
+        Subscription.objects.get(
+            author=self.author, follower=follower,
+        ).delete()
+
+    def get_feed(self, follower):
+        client = APIClient()
+        client.force_authenticate(follower)
+        response = client.get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def get_fanout(self):
+        self.author.refresh_from_db(fields=('feed_fanout',))
+        return self.author.feed_fanout
+
+    def test_hysteresis(self):
+        for follower in self.followers:
+            self.subscribe(follower)
+        self.assertFalse(self.get_fanout())
+        self.unsubscribe(self.followers[2])
+        self.assertFalse(self.get_fanout())
+        with self.assertNumQueries(4):
+            # Подписка у порога не заполняет ленты.
+            self.subscribe(self.followers[2])
+        self.assertFalse(self.get_fanout())
+        for follower in self.followers[1:]:
+            self.unsubscribe(follower)
+        self.assertTrue(self.get_fanout())
+
+    def test_feed_in_both_modes(self):
+        for follower in self.followers:
+            self.subscribe(follower)
+        self.assertEqual(self.get_feed(self.followers[0]), [self.recipe.pk])
+        self.unsubscribe(self.followers[2])
+        self.unsubscribe(self.followers[1])
+        self.assertTrue(self.get_fanout())
+        self.assertEqual(self.get_feed(self.followers[0]), [self.recipe.pk])
@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from food import constants
+from food.media import delete_orphans
+from food.models import MediaFile, Recipe
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaFilesTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def release(self, name):
+        MediaFile.objects.filter(name=name).update(
+            reference_count=0,
+            released_at=timezone.now() - timedelta(
+                seconds=constants.MEDIA_ORPHAN_GRACE + 1,
+            ),
+        )
+
+    def test_upload_holds_orphan(self):
+        name = default_storage.save('recipes/a.png', ContentFile(b'image'))
+        MediaFile.objects.create(name=name)
+        self.release(name)
+        self.assertEqual(
+            default_storage.save('recipes/b.png', ContentFile(b'image')),
+            name,
+        )
+        self.assertEqual(delete_orphans(), 0)
+        self.assertTrue(default_storage.exists(name))
+        self.release(name)
+        self.assertEqual(delete_orphans(), 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+    def test_image_change(self):
+        author = User.objects.create_user(
+            email='user@example.com',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        recipe = Recipe.objects.create(
+            author=author,
+            name='Рецепт',
+            image='recipes/old.png',
+            text='Описание',
+            cooking_time=10,
+        )
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        recipe.image = 'recipes/new.png'
+        recipe.save()
+        self.assertEqual(
+            dict(MediaFile.objects.values_list('name', 'reference_count')),
+            {'recipes/old.png': 0, 'recipes/new.png': 1},
+        )
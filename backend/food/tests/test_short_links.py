@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from food.models import Recipe
+from food.short_links import (
+    encode_short_link, resolve_short_link, short_link_cache,
+)
+from users.models import User
+
+
+class ShortLinksTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = author = User.objects.create_user(
+            email='user@example.com',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        cls.shared, cls.empty = [
+            Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {i}',
+                image='recipes/recipe.png',
+                text='Описание',
+                cooking_time=10,
+            )
+            for i in range(2)
+        ]
+        Recipe.objects.filter(pk=cls.shared.pk).update(short_link='AbCd1234')
+        Recipe.objects.filter(pk=cls.empty.pk).update(short_link=None)
+
+    def setUp(self):
+        short_link_cache.clear()
+
+    def test_backfill_keeps_shared_links(self):
+        call_command('backfill_short_links', stdout=StringIO())
+        self.shared.refresh_from_db()
+        self.empty.refresh_from_db()
+        self.assertEqual(self.shared.short_link, 'AbCd1234')
+        self.assertEqual(self.empty.short_link, encode_short_link(
+            self.empty.pk,
+        ))
+
+    def test_redirect(self):
+        response = self.client.get('/SL/AbCd1234/')
+        self.assertRedirects(
+            response,
+            f'/recipes/{self.shared.pk}/',
+            fetch_redirect_response=False,
+        )
+        response = self.client.get('/SL/zzzzzzzz/')
+        self.assertRedirects(
+            response, '/not-found/', fetch_redirect_response=False,
+        )
+
+    def create_recipe(self):
+        return Recipe.objects.create(
+            author=self.author,
+            name='Новый рецепт',
+            image='recipes/recipe.png',
+            text='Описание',
+            cooking_time=10,
+        )
+
+    def test_link_set_on_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            recipe = self.create_recipe()
+        self.assertEqual(recipe.short_link, encode_short_link(recipe.pk))
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "food_recipe"')
+        ])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.short_link, encode_short_link(recipe.pk))
+
+    def test_legacy_link_skipped(self):
+        # Старая случайная ссылка совпадает с кодом следующего рецепта.
+        legacy = encode_short_link(self.empty.pk + 1)
+        Recipe.objects.filter(pk=self.shared.pk).update(short_link=legacy)
+        recipe = self.create_recipe()
+        self.assertEqual(recipe.pk, self.empty.pk + 1)
+        self.assertEqual(recipe.short_link, encode_short_link(recipe.pk + 1))
+        self.assertEqual(self.create_recipe().pk, recipe.pk + 2)
+
+    def test_deleted_recipe_link(self):
+        self.assertEqual(resolve_short_link('AbCd1234'), self.shared.pk)
+        # Запись в кеше процесса устаревает со сменой общей версии.
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.filter(pk=self.shared.pk).delete()
+        self.assertIsNone(resolve_short_link('AbCd1234'))
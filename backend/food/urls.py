@@ -1,11 +1,12 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import RecipeRedirectView
+from .views import arecipe_redirect, recipe_redirect
 
 urlpatterns = [
     path(
         'SL/<slug:short_link>/',
-        RecipeRedirectView.as_view(),
+        arecipe_redirect if settings.ASYNC_VIEWS else recipe_redirect,
         name='recipe_redirect',
     )
 ]
@@ -0,0 +1,52 @@
+import time
+from functools import partial
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+# Отдельный кеш, в котором версии не вытесняются записями ответов.
+cache = ConnectionProxy(caches, 'versions')
+
+
+def get_cache_key(*parts):
+    return ':'.join(map(str, parts))
+
+
+def get_version(*parts):
+    """Версия данных: время последнего изменения в наносекундах."""
+    return get_versions(parts)[0]
+
+
+def get_versions(*keys):
+    """Версии для нескольких наборов данных за одно обращение к кешу."""
+    cache_keys = [get_cache_key('version', *parts) for parts in keys]
+    versions = cache.get_many(cache_keys)
+    missing = [key for key in cache_keys if key not in versions]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in cache_keys]
+
+
+async def aget_versions(*keys):
+    """Асинхронный вариант get_versions."""
+    cache_keys = [get_cache_key('version', *parts) for parts in keys]
+    versions = await cache.aget_many(cache_keys)
+    missing = [key for key in cache_keys if key not in versions]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            await cache.aadd(key, now, timeout=None)
+        versions.update(await cache.aget_many(missing))
+    return [versions[key] for key in cache_keys]
+
+
+def bump_version(*parts):
+    cache.set(get_cache_key('version', *parts), time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(*parts):
+    transaction.on_commit(partial(bump_version, *parts))
@@ -1,12 +1,18 @@
-from django.views.generic.base import RedirectView
+from django.http import HttpResponseRedirect
 
-from .models import Recipe
+from .short_links import aresolve_short_link, resolve_short_link
 
 
-class RecipeRedirectView(RedirectView):
-    def get_redirect_url(self, **kwargs):
-        try:
-            recipe = Recipe.objects.get(short_link=kwargs['short_link'])
-        except Recipe.DoesNotExist:
-            return '/not-found/'
-        return f'/recipes/{recipe.pk}/'
+def get_redirect(pk):
+    if pk is None:
+        return HttpResponseRedirect('/not-found/')
+    return HttpResponseRedirect(f'/recipes/{pk}/')
+
+
+def recipe_redirect(request, short_link):
+    return get_redirect(resolve_short_link(short_link))
+
+
+async def arecipe_redirect(request, short_link):
+    """Асинхронный вариант recipe_redirect для режима ASGI."""
+    return get_redirect(await aresolve_short_link(short_link))
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -16,6 +17,11 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split()
 
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', '').split()
 
+# wsgi — синхронные воркеры gunicorn, asgi — воркеры uvicorn
+# и асинхронные представления для чтения.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
+
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -26,7 +32,6 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
-    'django_cleanup.apps.CleanupConfig',
     'django_filters',
     'djoser',
     'api.apps.ApiConfig',
@@ -35,6 +40,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.DatabaseRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,17 +71,85 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB', 'django'),
-        'USER': os.getenv('POSTGRES_USER', 'django'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
-        'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+PRIMARY_DATABASE = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.getenv('POSTGRES_DB', 'django'),
+    'USER': os.getenv('POSTGRES_USER', 'django'),
+    'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+    'HOST': os.getenv('DB_HOST', ''),
+    'PORT': os.getenv('DB_PORT', 5432),
+    # Под ASGI каждый запрос выполняется в новом потоке со своим
+    # соединением, и постоянные соединения копились бы, а не
+    # переиспользовались; там нужен внешний пул (PgBouncer).
+    'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 0 if ASYNC_VIEWS else 60)),
+    'CONN_HEALTH_CHECKS': True,
+}
+
+# Реплики для чтения: хосты через пробел, порт — через двоеточие.
+DATABASE_REPLICAS = {
+    f'replica_{number}': {
+        **PRIMARY_DATABASE,
+        'HOST': host,
+        'PORT': port or PRIMARY_DATABASE['PORT'],
+        'TEST': {'MIRROR': 'default'},
     }
+    for number, (host, _, port) in enumerate(
+        host.partition(':') for host in os.getenv('DB_REPLICA_HOSTS', '').split()
+    )
 }
 
+DATABASES = {'default': PRIMARY_DATABASE, **DATABASE_REPLICAS}
+
+DATABASE_ROUTERS = ['api.db_routers.ReplicaRouter']
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        # Версии данных записываются без срока жизни, и Redis с
+        # maxmemory-policy volatile-lru никогда их не вытесняет.
+        'versions': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'versions',
+        },
+    }
+else:
+    # Кеш для разработки: файловый кеш перебирает все файлы при каждой
+    # записи и удаляет случайную треть при переполнении, поэтому версии
+    # лежат в отдельном кеше, который не очищается.
+    CACHE_BACKEND = os.getenv(
+        'CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache',
+    )
+    CACHE_LOCATION = os.getenv('CACHE_LOCATION', '/var/tmp/foodgram_cache')
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': CACHE_LOCATION,
+            'OPTIONS': {'MAX_ENTRIES': 100_000},
+        },
+        'versions': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': os.path.join(CACHE_LOCATION, 'versions'),
+            'OPTIONS': {'MAX_ENTRIES': sys.maxsize},
+        },
+    }
+
+# Хранить проверенные токены не только в памяти процесса, но и в CACHES.
+AUTH_TOKEN_SHARED_CACHE = os.getenv('AUTH_TOKEN_SHARED_CACHE') == 'True'
+
+# Каталог с гистограммами воркеров для /metrics.
+METRICS_DIR = os.getenv('METRICS_DIR', '/var/tmp/foodgram_metrics')
+# Доступ к /metrics: адреса или сети через пробел и/или токен Bearer.
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1 ::1').split()
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Заголовок Server-Timing раскрывает число и время запросов к БД.
+SERVER_TIMING = os.getenv('SERVER_TIMING', str(DEBUG)) == 'True'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,7 +181,12 @@ DJOSER = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ),
+
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.JSONRenderer',
+        'api.renderers.BrowsableAPIRenderer',
     ),
 
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageNumberLimitPagination',
@@ -133,6 +213,13 @@ STATIC_ROOT = BASE_DIR / '..' / 'static' / 'build' / 'static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {'BACKEND': 'food.storage.ContentAddressedStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
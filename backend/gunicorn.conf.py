@@ -0,0 +1,19 @@
+import os
+import shutil
+
+bind = '0.0.0.0:8000'
+
+# asgi — экспериментальный режим, см. README.
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+
+
+def on_starting(server):
+    # Гистограммы прошлого запуска не должны попадать в /metrics.
+    shutil.rmtree(
+        os.getenv('METRICS_DIR', '/var/tmp/foodgram_metrics'),
+        ignore_errors=True,
+    )
@@ -14,9 +14,11 @@ class FoodgramUserAdmin(UserAdmin):
             "fields": (
                 'username', 'email', 'first_name', 'last_name',
                 'avatar', 'password', 'is_active',
+                'recipes_count', 'followers_count',
             ),
         }),
     )
+    readonly_fields = ('recipes_count', 'followers_count')
     search_fields = ('username', 'email')
 
 
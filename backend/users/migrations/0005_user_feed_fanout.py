@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+# FEED_FANOUT_MAX_FOLLOWERS на момент миграции.
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+
+
+def fill_feed_fanout(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.filter(
+        followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS,
+    ).update(feed_fanout=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_fanout',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Рецепты копируются в ленты подписчиков'),
+        ),
+        migrations.RunPython(fill_feed_fanout, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,11 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 from . import constants
+from food.mixins import StoredCountersMixin, StoredFilesMixin
 from .validators import validate_username
 
 
-class User(AbstractUser):
+class User(StoredCountersMixin, StoredFilesMixin, AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
     email = models.EmailField(
@@ -27,6 +28,20 @@ class User(AbstractUser):
     avatar = models.ImageField(
         upload_to='avatars', null=True, blank=True, verbose_name='Аватар',
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Рецептов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Подписчиков',
+    )
+    feed_fanout = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Рецепты копируются в ленты подписчиков',
+    )
+
+    counter_fields = ('recipes_count', 'followers_count', 'feed_fanout')
+    file_fields = ('avatar',)
 
     class Meta:
         ordering = ('username',)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .models import Subscription
+from food.counters import update_counter
+from food.feed import update_feed_fanout
+from food.media import file_deleted, file_saved
+from food.versions import bump_version_on_commit
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, update_fields, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_version_on_commit('users')
+        bump_version_on_commit('user', instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(**kwargs):
+    bump_version_on_commit('users')
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    # Выход и удаление токена: кеш аутентификации во всех процессах.
+    bump_version_on_commit('auth', instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def subscriptions_changed(instance, **kwargs):
+    bump_version_on_commit('subscriptions', instance.follower_id)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_added(instance, created, **kwargs):
+    if created:
+        update_counter(User, instance.author_id, 'followers_count', 1)
+        # Режим лент автора зависит от уже обновлённого счётчика.
+        update_feed_fanout(instance.author_id, added=True)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_removed(instance, **kwargs):
+    update_counter(User, instance.author_id, 'followers_count', -1)
+    update_feed_fanout(instance.author_id, added=False)
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(instance, created, **kwargs):
+    file_saved(instance, 'avatar', created)
+
+
+@receiver(post_delete, sender=User)
+def avatar_deleted(instance, **kwargs):
+    file_deleted(instance, 'avatar')